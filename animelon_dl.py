@@ -1,41 +1,129 @@
 #!/usr/bin/env python3
 
-from requests import get , post, Session
 import time
 import os
+import random
 import json
-import numpy as np
-from multiprocessing import Process
-import progressbar
 import argparse
 import sys
-import subtitle_decryptor
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from threading import Lock, local, Thread, Event, get_ident
+from functools import partial
+from collections import deque
+from session_pool import SessionPool
+from metadata_cache import MetadataCache
+from library_state import LibraryState
+from rate_limiter import RateLimiter
+from metrics import RunMetrics
+from progress_board import ProgressBoard
+from integrity import IntegrityStore, IntegrityError
+from work_queue import WorkQueue
+from content_store import ContentStore
+from bandwidth_limiter import BandwidthLimiter
+from download_pool import DownloadPool
+from json_select import selectJSON
+from urllib.parse import urlsplit
+
+class RefusedError(IOError):
+	'''
+		Raised when the CDN refuses a video URL, like an expired link
+	'''
+	pass
+
+def decryptSubtitles(encryptedSubtitles:list):
+	'''
+		Decrypts a batch of subtitles, run in the worker processes of harvestSubtitles
+			Parameters:
+				encryptedSubtitles: a list of (languageSub, encryptedSubtitle) tuples
+			Returns:
+				a list of (languageSub, subtitleContent) tuples
+	'''
+	import subtitle_decryptor
+	contents = subtitle_decryptor.SubtitleDecryptor().decrypt_many([encrypted for languageSub, encrypted in encryptedSubtitles])
+	return (list(zip([languageSub for languageSub, encrypted in encryptedSubtitles], contents)))
+
+def readURLs(URLs:list, files:list=()):
+	'''
+		Yields the URLs of a list then the URLs of files, one per line, without duplicates, blank lines or # comments.
+		The files are read as the URLs are consumed, so URLs piped on stdin are downloaded as they arrive.
+			Parameters:
+				URLs: a list of URLs
+				files: a list of files to read URLs from, "-" reads stdin
+	'''
+	def lines():
+		yield from URLs
+		for path in files:
+			with (open(sys.stdin.fileno(), 'r', closefd=False) if path == "-" else open(path, 'r')) as f:
+				yield from f
+	seen = set()
+	for url in lines():
+		url = url.strip()
+		if url == "" or url.startswith("#") or url.rstrip("/") in seen:
+			continue
+		seen.add(url.rstrip("/"))
+		yield (url)
 
 class AnimelonDownloader():
-	def __init__(self, baseURL:str="https://animelon.com/", session=Session(), processMax:int=1, sleepTime:int=0,
+	def __init__(self, baseURL:str="https://animelon.com/", session=None, processMax:int=1, sleepTime:int=0,
 				maxTries:int=5, savePath:str="./", subtitlesTypes:list=["englishSub", "romajiSub", "hiraganaSub", "japaneseSub"],
-				sleepTimeRetry=5, qualityPriorities=["ozez", "stz", "tsz"], subtitlesOnly=False,
-				userAgent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/92.0.4515.107 Safari/537.36"):
+				sleepTimeRetry=5, qualityPriorities=["ozez", "stz", "tsz"], subtitlesOnly=False, segments:int=1,
+				minSegmentSize:int=8 * 1024 ** 2, engine:str="process", useCache=True, cachePath:str=None, seriesCacheTTL:float=24 * 3600,
+				videoCacheTTL:float=3600, offline=False, sync=False, statePath:str=None, apiRate:float=5, cdnRate:float=20,
+				subtitleWorkers:int=None, metricsPath:str=None, prometheusPath:str=None, showProgress=True,
+				chunkSize:int=4 * 1024 ** 2, fsync=False, hashAlgorithm:str=None, prefetch:int=4,
+				storePath:str=None, linkMode:str="auto", maxBandwidth:float=0, maxHostConnections:int=0, bandwidthPath:str=None, userAgent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/92.0.4515.107 Safari/537.36"):
 		'''
 			Initialize the downloader
 			Parameters:
 				baseURL: the base url of the API
-				session: the requests session
+				session: the requests session used for the API with the default user agent, created by the first request if None
 				processMax: the maximum number of processes to use
-				sleepTime: the time to sleep between requests
+				sleepTime: the minimum time to sleep between starting two background downloads
 				maxTries: the maximum number of tries to make
 				savePath: the path to save the files to
 				subtitlesTypes: the types of subtitle to download (englishSub, romajiSub, hiraganaSub, japaneseSub)
 				userAgent: the user agent to use
-				sleepTimeRetry: the time to sleep between retries
+				sleepTimeRetry: the first backoff in seconds before a retry, doubled after each failure
 				qualityPriorities: the quality priorities to use [best, .., worst], ozez is the best, stz is the medium, tsz is the worst
+				segments: the maximum number of simultaneous byte ranges to download a single video with
+				minSegmentSize: the minimum size in bytes of a byte range
+				engine: how background downloads are run, "process" forks a process per download,
+					"thread" runs them in a pool of processMax threads inside this process
+				useCache: whether to keep the API responses in a local cache
+				cachePath: the SQLite file of the cache, defaults to .animelon_cache.sqlite in savePath
+				seriesCacheTTL: how long in seconds a cached series is used before being fetched again
+				videoCacheTTL: how long in seconds a cached findByVideo response (and its CDN links) is used before being fetched again
+				offline: only use cached API responses, whatever their age
+				sync: only download the episodes and subtitles missing from the library state
+				statePath: the SQLite file of the library state, defaults to .animelon_state.sqlite in savePath
+				apiRate: the maximum number of API requests per second, shared by all the workers, 0 for no limit
+				cdnRate: the maximum number of CDN requests per second, shared by all the workers, 0 for no limit
+				subtitleWorkers: the number of processes decrypting subtitles in harvestSubtitles, defaults to the number of cores
+				metricsPath: the JSON-lines file the events of the run are appended to, None disables the metrics
+				prometheusPath: the Prometheus textfile the summary of the run is written to by metrics.finish()
+				showProgress: if True, a progress line of all the running downloads is redrawn twice per second
+				chunkSize: the size in bytes of the buffer each transfer reads the video into and writes from
+				fsync: if True, a video is flushed to the disk before it is renamed from its .part file
+				hashAlgorithm: the hashlib algorithm (sha256, md5, blake2b...) of the hashes computed while the videos are written,
+					None only records their size, ETag and Last-Modified
+				prefetch: the number of upcoming episodes of a series whose metadata and subtitles are fetched while the videos before them download,
+					0 fetches them in the worker of each episode
+				storePath: the directory of a content-addressed store keeping each distinct video once, the episode files become links to it,
+					None disables it
+				linkMode: how the episode files are linked to the store, "reflink", "hardlink", or "auto" which tries a reflink first
+				maxBandwidth: the maximum number of bytes per second of all the video transfers, shared fairly between them, 0 for no limit
+				maxHostConnections: the maximum number of simultaneous video transfers from a CDN host, 0 for no limit
+				bandwidthPath: a file holding maxBandwidth in MB/s, read again when it changes to adjust the limit while downloading
 		'''
 		self.baseURL = baseURL
 		self.session = session
 		self.userAgent = userAgent
 		self.headers = { "User-Agent": self.userAgent }
-		self.apiVideoFormat = "https://animelon.com/api/languagevideo/findByVideo?videoId=%s&learnerLanguage=en&subs=1&cdnLink=1&viewCounter=1"
-		self.session.headers.update(self.headers)
+		self.apiVideoFormat = self.baseURL + "api/languagevideo/findByVideo?videoId=%s&learnerLanguage=en&subs=1&cdnLink=1&viewCounter=1"
+		# every simultaneous download may hold up to `segments` connections to the same CDN host
+		self.sessionPool = SessionPool(poolMaxSize=max(10, processMax * segments))
+		if session is not None:
+			self.sessionPool.put(self.baseURL, self.userAgent, self.session)
 		self.processList = []
 		self.processMax = processMax
 		self.sleepTime = sleepTime
@@ -46,35 +134,180 @@ class AnimelonDownloader():
 		self.subtitlesTypes = subtitlesTypes
 		self.qualityPriorities = qualityPriorities
 		self.subtitlesOnly = subtitlesOnly
+		self.segments = segments
+		self.minSegmentSize = minSegmentSize
+		assert engine in ("process", "thread"), engine
+		self.engine = engine
+		self.executor = None
+		self.seriesCacheTTL = seriesCacheTTL
+		self.videoCacheTTL = videoCacheTTL
+		self.offline = offline
+		self.metadataCache = None
+		if useCache or offline:
+			self.metadataCache = MetadataCache(cachePath or os.path.join(self.savePath, ".animelon_cache.sqlite"))
+		self.sync = sync
+		self.libraryState = LibraryState(statePath or os.path.join(self.savePath, ".animelon_state.sqlite"))
+		# created before any worker is forked so that they all share the same budgets,
+		# the CDN answers 403 to the wrong user agent so only 429 means throttling there
+		self.apiRateLimiter = RateLimiter(apiRate, backoffBase=sleepTimeRetry)
+		self.cdnRateLimiter = RateLimiter(cdnRate, throttleStatusCodes=(429,), backoffBase=sleepTimeRetry)
+		self.subtitleWorkers = subtitleWorkers or os.cpu_count() or 1
+		self._decryptor = None
+		self.metrics = RunMetrics(metricsPath, prometheusPath)
+		# created before any worker is forked, every worker reports to the same board
+		self.progress = ProgressBoard(slots=max(16, processMax), show=showProgress)
+		self.chunkSize = chunkSize
+		self.fsync = fsync
+		self.integrity = IntegrityStore(hashAlgorithm)
+		self.prefetch = prefetch
+		self.contentStore = ContentStore(storePath, linkMode) if storePath is not None else None
+		# created before any worker is forked so that they all share the same bandwidth
+		self.bandwidth = BandwidthLimiter(maxBandwidth, maxHostConnections, bandwidthPath, flowSlots=max(64, processMax * segments))
+		# one transfer buffer per thread, reused by all its downloads
+		self.buffers = local()
+		# the DownloadJob run by each thread of the pool, whose transfers count its bytes and stop once it is cancelled
+		self.currentJob = local()
+		# whether the CDN refused the last video of each thread, its retry then refreshes the cached links
+		self.refusals = local()
+		self.pool = None
+		self.poolLock = Lock()
+
+	@property
+	def decryptor(self):
+		'''
+			The SubtitleDecryptor of the downloader, pycryptodome is only imported once a subtitle is decrypted
+		'''
+		if self._decryptor is None:
+			import subtitle_decryptor
+			self._decryptor = subtitle_decryptor.SubtitleDecryptor()
+		return (self._decryptor)
+
 	def updateUserAgent(self, userAgent:str):
 		'''
-			Updates the user agent
+			Updates the default user agent
 			Parameters:
 				userAgent: the new user agent
 		'''
 		self.userAgent = userAgent
 		self.headers = { "User-Agent": self.userAgent }
-		self.session.headers.update(self.headers)
+
+	def request(self, method:str, url:str, userAgent:str=None, **kwargs):
+		'''
+			Sends a request through the keep-alive session of its host and user agent,
+			once the rate limiter of the API or of the CDN allows it
+				Parameters:
+					method: the HTTP method
+					url: the url to request
+					userAgent: the user agent to send, defaults to self.userAgent
+					kwargs: passed to requests
+				Returns:
+					the response
+		'''
+		job = getattr(self.currentJob, "job", None)
+		if job is not None:
+			job.checkCancelled()
+		if userAgent is None:
+			userAgent = self.userAgent
+		rateLimiter = self.apiRateLimiter if url.startswith(self.baseURL + "api/") else self.cdnRateLimiter
+		rateLimiter.acquire()
+		start = time.time()
+		try:
+			response = self.sessionPool.get(url, userAgent).request(method, url, **kwargs)
+		except Exception as e:
+			rateLimiter.feedback(None)
+			self.metrics.event("request", method=method, host=urlsplit(url).netloc, status=None, seconds=round(time.time() - start, 3), error=str(e))
+			raise
+		backoff = rateLimiter.feedback(response.status_code, response.headers.get("Retry-After"))
+		self.metrics.event("request", method=method, host=urlsplit(url).netloc, status=response.status_code,
+			seconds=round(time.time() - start, 3), backoff=round(backoff, 3))
+		return (response)
+
+	def backoff(self, tries:int):
+		'''
+			Sleeps before a retry, an exponential backoff with full jitter
+				Parameters:
+					tries: the index of the try that failed, starting at 0
+		'''
+		delay = random.uniform(0, min(120, self.sleepTimeRetry * 2 ** tries))
+		job = getattr(self.currentJob, "job", None)
+		if job is None:
+			time.sleep(delay)
+			return
+		# a cancelled job doesn't wait for its retry
+		job.cancelled.wait(delay)
+		job.checkCancelled()
+
+	def getAPIResponse(self, url:str, ttl:float=None, maxTries:int=None, refresh=False):
+		'''
+			Returns the content of an API response, from the metadata cache if it is recent enough
+				Parameters:
+					url: the API url
+					ttl: the maximum age in seconds of a cached response, None accepts any age
+					maxTries: the number of requests to make before giving up, defaults to self.maxTries
+					refresh: if True, the cached response is ignored (unless offline)
+				Returns:
+					the content of the response, or None if it could not be fetched
+		'''
+		if self.metadataCache is not None and (self.offline or not refresh):
+			content = self.metadataCache.get(url, None if self.offline else ttl)
+			if content is not None:
+				return (content)
+		if self.offline:
+			print ("Error: %s is not in the cache (offline mode)" % url, file=sys.stderr)
+			return (None)
+		if maxTries is None:
+			maxTries = self.maxTries
+		from requests import RequestException
+		for tries in range(maxTries):
+			if tries > 0:
+				self.backoff(tries - 1)
+			try:
+				response = self.request("GET", url)
+			except RequestException as e:
+				# a reset connection or a timeout is retried like a throttled response
+				print ("Error getting", url, "(", e, ")", file=sys.stderr)
+				continue
+			if response.status_code == 200:
+				if self.metadataCache is not None:
+					self.metadataCache.put(url, response.content)
+				return (response.content)
+		return (None)
 
 	def __repr__(self):
 		'''
 			Returns:
 				the string representation of the object
 		'''
-		rep = 'AnimelonDownloader(baseURL="%s", processMax=%d, sleepTime=%d, maxTries=%d, savePath="%s", session=%s, userAgent="%s", headers="%s", processList=%s)' \
-		% (self.baseURL, self.processMax, self.sleepTime, self.maxTries, self.savePath, self.session, self.userAgent, self.headers, self.processList)
+		rep = 'AnimelonDownloader(baseURL="%s", processMax=%d, sleepTime=%d, maxTries=%d, savePath="%s", session=%s, userAgent="%s", headers="%s", engine="%s", processList=%s)' \
+		% (self.baseURL, self.processMax, self.sleepTime, self.maxTries, self.savePath, self.session, self.userAgent, self.headers, self.engine, self.processList)
 		return (rep)
 
 	def waitForFreeProcess(self, processMax=None):
 		'''
-			Waits for the process list to be < processMax long
+			Waits for the process list to be < processMax long, returns as soon as a task finishes
 		'''
 		if processMax is None:
 			processMax = self.processMax
 		while len(self.processList) >= processMax:
-			newList = [process for process in self.processList if process.is_alive()]
-			self.processList = newList
-			time.sleep(self.sleepTime)
+			if self.engine == "thread":
+				wait(self.processList, return_when=FIRST_COMPLETED)
+				self.processList = [task for task in self.processList if not task.done()]
+			else:
+				from multiprocessing.connection import wait as waitForSentinels
+				waitForSentinels([process.sentinel for process in self.processList])
+				self.processList = [process for process in self.processList if process.is_alive()]
+
+	def reportBackgroundTask(self, task):
+		'''
+			Prints the traceback of a background task of the thread engine that failed, like a forked process does
+		'''
+		if task.cancelled():
+			return
+		error = task.exception()
+		if error is not None:
+			import traceback
+			print ("Background task failed :", file=sys.stderr)
+			traceback.print_exception(type(error), error, error.__traceback__, file=sys.stderr)
 
 	def launchBackgroundTask(self, function, args:tuple):
 		'''
@@ -83,52 +316,596 @@ class AnimelonDownloader():
 					function: the function to run
 					args: the arguments to pass to the function
 				Returns:
-					the process
+					the process, or a Future with the thread engine
 		'''
 		self.waitForFreeProcess()
+		if self.engine == "thread":
+			if self.executor is None:
+				self.executor = ThreadPoolExecutor(max_workers=self.processMax)
+			task = self.executor.submit(function, *args)
+			task.add_done_callback(self.reportBackgroundTask)
+			self.processList.append(task)
+			return (task)
+		from multiprocessing import Process
 		p = Process(target=function, args=args)
 		self.processList.append(p)
 		p.start()
 		return (p)
 
+	def submit(self, url:str, seasonsToDownload:list=None, episodesToDownload:dict=None):
+		'''
+			Starts downloading a series or video page url in the threads of the download pool, without waiting for it
+				Parameters:
+					url: url of the video or series page
+					seasonsToDownload: list of seasons to download
+					episodesToDownload: dict of episodes to download, keys are season number, values are list of episode numbers
+				Returns:
+					the DownloadJob following its status, progress and files, which can be waited for or cancelled
+		'''
+		with self.poolLock:
+			if self.pool is None:
+				self.pool = DownloadPool(self)
+		return (self.pool.submit(url, seasonsToDownload, episodesToDownload))
+
+	def close(self, wait=True, cancel=False):
+		'''
+			Stops the download pool and the background downloads, then closes the sessions
+				Parameters:
+					wait: if True, waits for the submitted jobs and the background downloads to finish
+					cancel: if True, the jobs of the download pool are cancelled first
+		'''
+		if self.pool is not None:
+			self.pool.shutdown(wait=wait, cancel=cancel)
+		if wait:
+			self.waitForFreeProcess(1)
+		if self.executor is not None:
+			self.executor.shutdown(wait=wait)
+		self.progress.close()
+		self.sessionPool.close()
+
+	def __enter__(self):
+		return (self)
+
+	def __exit__(self, type, value, traceback):
+		self.close()
+
 	def __del__(self):
 		'''
-			Closes the session
+			Closes the sessions without waiting, the interpreter still joins the background processes and threads at exit
 		'''
-		self.waitForFreeProcess(1)
+		if "pool" in self.__dict__:
+			self.close(wait=False)
 
-	def downloadVideo(self, url, fileName=None, stream=None, quality="unknown"):
+	def downloadVideo(self, url, fileName=None, stream=None, quality="unknown", userAgent=None):
 		'''
-			Downloads a video from the url
+			Downloads a video from the url to fileName + ".part", resuming it if it already exists,
+			and renames it to fileName once complete
 				Parameters:
 					url: the url of the video
 					fileName: the name of the video
 					stream: the stream to download from (mp4, webm, ogg, mkv)
+					userAgent: the user agent the CDN expects for this url
 				Returns:
-					the file name
+					the file name, or None if the download is incomplete
 		'''
 		if fileName is None:
 			fileName = url.split("/")[-1] + ".mp4"
 			fileName = os.path.join(self.savePath, fileName)
+		partName = fileName + ".part"
+		if os.path.exists(partName + ".segments"):
+			# a segmented download was interrupted, it knows which ranges are left
+			if stream is not None:
+				stream.close()
+			return (self.downloadVideoSegmented(url, fileName, userAgent=userAgent, quality=quality))
+		offset = os.path.getsize(partName) if os.path.exists(partName) else 0
+		validator = self.loadPartValidator(partName) if offset > 0 else None
+		if offset > 0 and validator is None:
+			# nothing tells which version of the video the .part file holds, appending to it could mix two versions
+			print ("Download of ", fileName, "restarted (no record of the .part file)", file=sys.stderr)
+			offset = 0
+		elif offset > 0 and validator.get("quality", quality) != quality:
+			print ("Download of ", fileName, "restarted (the .part file is in %s quality)" % (validator["quality"]), file=sys.stderr)
+			offset = 0
 		video = stream
-		if video is None:
-			video = self.session.get(url, stream=True)
-			# Estimates the number of bar updates
-		block_size = 1024
-		file_size = int(video.headers.get('Content-Length', None))
-		print ("Downloading : ", fileName.split('/')[-1] , "(%.2f MB)" % (file_size * 1024 ** -2) , quality, " quality", " ...\n")
-		n_chunk = 2
-		num_bars = np.ceil(file_size / (n_chunk * block_size))
-		bar = None
-		if len(self.processList) == 1:
-			bar = progressbar.ProgressBar(maxval=num_bars).start()
-		with open(fileName, 'wb') as f:
-			for i, chunk in enumerate(video.iter_content(chunk_size=n_chunk * block_size)):
-				f.write(chunk)
-				if bar is not None:
-					bar.update(i+1)
+		# the transfer counts against the connections of its CDN host from its request to its last byte
+		flow = self.bandwidth.open(urlsplit(url).netloc)
+		try:
+			if video is None or offset > 0:
+				if video is not None:
+					video.close()
+				headers = None
+				if offset > 0:
+					headers = { "Range": "bytes=%d-" % offset }
+					# the CDN sends the whole video instead of the rest if it changed since the .part file was started
+					if validator["etag"] is not None and not validator["etag"].startswith("W/"):
+						headers["If-Range"] = validator["etag"]
+					elif validator["lastModified"] is not None:
+						headers["If-Range"] = validator["lastModified"]
+				video = self.request("GET", url, userAgent, stream=True, headers=headers)
+			if offset > 0 and video.status_code in (206, 416):
+				reason = self.checkPartValidator(validator, video)
+				if reason is None and video.status_code == 416:
+					if offset == validator["size"]:
+						# nothing left to download, the .part file was complete but never renamed
+						video.close()
+						return (self.completePart(fileName, validator["size"], validator["etag"], validator["lastModified"]))
+					reason = "the .part file is %d bytes instead of %d" % (offset, validator["size"])
+				if reason is not None:
+					video.close()
+					print ("Download of ", fileName, "restarted (", reason, ")", file=sys.stderr)
+					offset = 0
+					video = self.request("GET", url, userAgent, stream=True)
+			if video.status_code not in (200, 206):
+				print ("Download of ", fileName, "refused by the CDN (HTTP", video.status_code, ")", file=sys.stderr)
+				self.refusals.refused = True
+				video.close()
+				return (None)
+			if video.status_code == 206:
+				file_size = offset + int(video.headers.get('Content-Length', None))
+			else:
+				offset = 0
+				file_size = int(video.headers.get('Content-Length', None))
+			print ("Downloading : ", fileName.split('/')[-1] , "(%.2f MB)" % (file_size * 1024 ** -2) , quality, " quality",
+				" (resuming at %.2f MB)" % (offset * 1024 ** -2) if offset > 0 else "", " ...\n")
+			if offset == 0 and video.headers.get('Accept-Ranges', 'none') != 'none':
+				# the file is preallocated and its progress saved to the .segments file, even for a single range
+				return (self.downloadVideoSegmented(url, fileName, self.splitRanges(file_size), stream=video, userAgent=userAgent, flow=flow,
+					quality=quality))
+			hasher = self.integrity.newHasher()
+			if hasher is not None and offset > 0:
+				# the hash covers the whole video, the part downloaded by a previous run is read once
+				self.integrity.hashRange(partName, 0, offset, hasher)
+			if offset == 0:
+				self.savePartValidator(partName, file_size, video, quality)
+			self.writeStream(video, partName, file_size - offset, append=offset > 0, hasher=hasher, flow=flow)
+			return (self.completePart(fileName, file_size, video.headers.get("ETag"), video.headers.get("Last-Modified"),
+				[[0, file_size - 1, hasher.hexdigest()]] if hasher is not None else None))
+		finally:
+			self.bandwidth.close(flow)
+
+	def completePart(self, fileName, fileSize:int, etag:str=None, lastModified:str=None, hashes:list=None):
+		'''
+			Renames fileName + ".part" to fileName if it has the expected size, and records its integrity next to it
+				Parameters:
+					fileName: the name of the video
+					fileSize: the expected size of the video in bytes
+					etag: the ETag header of the CDN
+					lastModified: the Last-Modified header of the CDN
+					hashes: the [start, end, hexdigest] of the byte ranges hashed while downloading, end included
+				Returns:
+					the file name, or None if the .part file is incomplete
+		'''
+		partName = fileName + ".part"
+		size = os.path.getsize(partName)
+		if size != fileSize:
+			print ("Incomplete download : ", fileName.split('/')[-1], "(%d / %d bytes)" % (size, fileSize), file=sys.stderr)
+			if size > fileSize:
+				os.remove(partName)
+			return (None)
+		if self.fsync:
+			with open(partName, 'rb') as f:
+				os.fsync(f.fileno())
+		os.replace(partName, fileName)
+		if self.fsync and hasattr(os, "O_DIRECTORY"):
+			# makes the rename itself durable
+			directory = os.open(os.path.dirname(os.path.abspath(fileName)), os.O_RDONLY | os.O_DIRECTORY)
+			try:
+				os.fsync(directory)
+			finally:
+				os.close(directory)
+		self.integrity.save(fileName, fileSize, etag, lastModified, hashes, self.integrity.algorithm)
+		for stateName in (partName + ".segments", partName + ".validator"):
+			if os.path.exists(stateName):
+				os.remove(stateName)
+		return (fileName)
+
+	def savePartValidator(self, partName, fileSize:int, response, quality:str=None):
+		'''
+			Records the size, the quality and the validators of the CDN response a .part file is written from,
+			so that resuming it only appends the same version of the video
+		'''
+		with open(partName + ".validator.tmp", 'w') as f:
+			json.dump({ "size" : fileSize, "etag" : response.headers.get("ETag"), "lastModified" : response.headers.get("Last-Modified"),
+				"quality" : quality }, f)
+		os.replace(partName + ".validator.tmp", partName + ".validator")
+
+	def loadPartValidator(self, partName):
+		'''
+			Returns:
+				the record written by savePartValidator for a .part file, or None if it has none
+		'''
+		try:
+			with open(partName + ".validator", 'r') as f:
+				return (json.load(f))
+		except (OSError, ValueError):
+			return (None)
+
+	def checkPartValidator(self, validator:dict, response):
+		'''
+			Compares a response for the rest of a .part file with the record of its first response
+				Parameters:
+					validator: the size, ETag and Last-Modified of the video the .part file holds, as returned by loadPartValidator
+					response: the 200, 206 or 416 response to a request for the video
+				Returns:
+					None if the response is for the same version of the video, or the reason why it isn't
+		'''
+		total = response.headers.get('Content-Range', '*/*').split('/')[-1]
+		if response.status_code == 200:
+			total = response.headers.get('Content-Length', '*')
+		if total.isdigit() and int(total) != validator["size"]:
+			return ("the video is now %s bytes instead of %d" % (total, validator["size"]))
+		for header, key in (("ETag", "etag"), ("Last-Modified", "lastModified")):
+			if validator[key] is not None and response.headers.get(header, validator[key]) != validator[key]:
+				return ("%s %s instead of %s" % (header, response.headers.get(header), validator[key]))
+		return (None)
+
+	def isDownloaded(self, fileName):
+		'''
+			Returns:
+				True if the video was completely downloaded to fileName,
+				False if it is missing or doesn't match its integrity record, so that it is downloaded again
+		'''
+		if not os.path.isfile(fileName):
+			return (False)
+		valid, reason = self.integrity.check(fileName)
+		if valid is False:
+			print ("Corrupt video : ", fileName.split('/')[-1], "(", reason, "), downloading it again", file=sys.stderr)
+			return (False)
+		return (True)
+
+	def writeStream(self, video, fileName, file_size:int, append=False, hasher=None, flow=None):
+		'''
+			Writes a whole video response to a file
+				Parameters:
+					video: the streamed response
+					fileName: the name of the file to write to
+					file_size: the expected size of the response in bytes
+					append: if True, the response is appended to the file instead of replacing it
+					hasher: a hash object updated with every byte written
+					flow: the bandwidth Flow of the response, a new one is opened if None, it is closed once the response is written
+				Returns:
+					the file name
+		'''
+		if flow is None:
+			flow = self.bandwidth.open(urlsplit(video.url).netloc)
+		slot = self.progress.start(os.path.basename(fileName).replace(".mp4.part", ""), file_size)
+		start = time.time()
+		written = 0
+		with open(fileName, 'ab' if append else 'wb') as f:
+			try:
+				for size in self.copyStream(video, f, hasher=hasher, flow=flow):
+					written += size
+					self.progress.advance(slot, size)
+			except Exception as e:
+				# what was written so far is kept in the file and will be resumed
+				print ("Download of ", fileName, "interrupted (", e, ")", file=sys.stderr)
+			finally:
+				self.progress.finish(slot)
+				self.bandwidth.close(flow)
+		self.metrics.event("transfer", file=os.path.basename(fileName), host=urlsplit(video.url).netloc, status=video.status_code, bytes=written,
+			expected=file_size, seconds=round(time.time() - start, 3), ttfb=round(video.elapsed.total_seconds(), 3))
 		return (fileName)
-		# (did not)Add a little sleep so you can see the bar progress
+
+	def getBuffer(self):
+		'''
+			Returns:
+				the transfer buffer of the current thread, chunkSize bytes long
+		'''
+		buffer = getattr(self.buffers, "buffer", None)
+		if buffer is None or len(buffer) != self.chunkSize:
+			buffer = self.buffers.buffer = bytearray(self.chunkSize)
+		return (buffer)
+
+	def withCurrentJob(self, function):
+		'''
+			Returns:
+				function running with the DownloadJob of the current thread, for the threads a download starts (like its segments)
+		'''
+		job = getattr(self.currentJob, "job", None)
+		def run(*args, **kwargs):
+			self.currentJob.job = job
+			try:
+				return (function(*args, **kwargs))
+			finally:
+				self.currentJob.job = None
+		return (run)
+
+	def copyStream(self, response, f, limit:int=None, hasher=None, flow=None):
+		'''
+			Copies the body of a streamed response to a file through the transfer buffer of the thread.
+			An uncompressed body is read from the connection straight into the buffer, so a chunk costs no new bytes object.
+				Parameters:
+					response: the streamed response
+					f: the file to write to, from its current position
+					limit: the maximum number of bytes to copy, None copies the whole body
+					hasher: a hash object updated with each chunk from the buffer, while it is still in the cache
+					flow: the bandwidth Flow the chunks are drawn from, the reads are cut to the quantum of the limiter
+				Yields:
+					the number of bytes written by each chunk
+				Raises:
+					DownloadCancelled after a chunk, if the DownloadJob of the thread was cancelled
+		'''
+		view = memoryview(self.getBuffer())
+		job = getattr(self.currentJob, "job", None)
+		# the http.client response under urllib3, reading from it skips the copies made by requests and urllib3
+		from http.client import HTTPResponse
+		body = getattr(response.raw, "_fp", None)
+		if not isinstance(body, HTTPResponse):
+			# another version of urllib3 or another adapter, the raw response is read through its public readinto
+			body = response.raw
+		if not hasattr(body, "readinto") or response.headers.get("Content-Encoding", "identity") != "identity":
+			for chunk in response.iter_content(chunk_size=self.bandwidth.quantum(len(view))):
+				if limit is not None:
+					chunk = chunk[:limit]
+					limit -= len(chunk)
+				self.bandwidth.consume(flow, len(chunk))
+				f.write(chunk)
+				if hasher is not None:
+					hasher.update(chunk)
+				if job is not None:
+					job.advance(len(chunk))
+				yield (len(chunk))
+				if limit == 0:
+					return
+			return
+		while limit is None or limit > 0:
+			# the rate may change during the transfer, and with it the quantum
+			size = self.bandwidth.quantum(len(view))
+			if limit is not None:
+				size = min(size, limit)
+			self.bandwidth.consume(flow, size)
+			size = body.readinto(view if size >= len(view) else view[:size])
+			if not size:
+				break
+			f.write(view[:size])
+			if hasher is not None:
+				hasher.update(view[:size])
+			if limit is not None:
+				limit -= size
+			if job is not None:
+				job.advance(size)
+			yield (size)
+		if body is not response.raw and body.isclosed():
+			# the whole body was read, the connection goes back to the pool
+			response.raw.release_conn()
+
+	def preallocate(self, fileName, fileSize:int):
+		'''
+			Creates fileName with fileSize bytes reserved on the disk, or as a sparse file if the file system can't reserve them
+		'''
+		with open(fileName, 'wb') as f:
+			if hasattr(os, "posix_fallocate") and fileSize > 0:
+				try:
+					os.posix_fallocate(f.fileno(), 0, fileSize)
+					return
+				except OSError:
+					pass
+			f.truncate(fileSize)
+
+	def splitRanges(self, fileSize:int):
+		'''
+			Splits a file into the byte ranges used by segmented downloads
+				Parameters:
+					fileSize: the size of the file in bytes
+				Returns:
+					a list of (start, end) tuples, end included, a single range means no segmentation
+		'''
+		count = max(1, min(self.segments, fileSize // max(1, self.minSegmentSize)))
+		segmentSize = -(-fileSize // count)
+		return ([(start, min(start + segmentSize, fileSize) - 1) for start in range(0, fileSize, segmentSize)] or [(0, -1)])
+
+	def downloadSegment(self, url, fileName, start:int, end:int, stream=None, progress=None, written:int=0, userAgent=None, hasher=None,
+					validator:dict=None, flow=None):
+		'''
+			Downloads the byte range [start, end] of a video and writes it at its offset in the file
+				Parameters:
+					url: the url of the video
+					fileName: the file to write to, it must already exist
+					start: the first byte of the range
+					end: the last byte of the range
+					stream: an already opened response for this range, or for the whole file if the range starts at 0
+					progress: a function called with the number of bytes written after each chunk
+					written: the number of bytes of the range already in the file
+					userAgent: the user agent the CDN expects for this url
+					hasher: a hash object of the bytes already in the file, updated with the rest of the range
+					validator: the size, ETag and Last-Modified of the video the file holds, None to skip the checks
+					flow: the bandwidth Flow of the stream, a new one is opened if None, it is closed once the range is done
+				Returns:
+					the number of bytes written
+		'''
+		if written >= end - start + 1:
+			self.bandwidth.close(flow)
+			return (written)
+		if flow is None:
+			flow = self.bandwidth.open(urlsplit(url).netloc)
+		try:
+			for tries in range(self.maxTries):
+				if written >= end - start + 1:
+					return (written)
+				if stream is None:
+					stream = self.request("GET", url, userAgent, stream=True, headers={ "Range": "bytes=%d-%d" % (start + written, end) })
+				reason = self.checkPartValidator(validator, stream) if validator is not None and stream.status_code in (200, 206, 416) else None
+				if reason is not None:
+					stream.close()
+					raise IntegrityError("%s changed on the CDN (%s)" % (url, reason))
+				if stream.status_code != 206 and not (stream.status_code == 200 and start + written == 0):
+					stream.close()
+					raise RefusedError("Server refused range %d-%d of %s (HTTP %d)" % (start + written, end, url, stream.status_code))
+				transferStart = time.time()
+				before = written
+				try:
+					with open(fileName, 'r+b') as f:
+						f.seek(start + written)
+						for size in self.copyStream(stream, f, limit=end - start + 1 - written, hasher=hasher, flow=flow):
+							written += size
+							if progress is not None:
+								progress(size)
+				except Exception as e:
+					print ("Segment %d-%d of %s interrupted, retrying ... (" % (start, end, fileName), e, ")", file=sys.stderr)
+					self.backoff(tries)
+				finally:
+					stream.close()
+					self.metrics.event("transfer", file=os.path.basename(fileName), host=urlsplit(stream.url).netloc, status=stream.status_code,
+						bytes=written - before, expected=end - start + 1 - before, seconds=round(time.time() - transferStart, 3),
+						ttfb=round(stream.elapsed.total_seconds(), 3), range=[start, end])
+					stream = None
+			if written >= end - start + 1:
+				return (written)
+			raise IOError("Failed to download range %d-%d of %s" % (start, end, url))
+		finally:
+			self.bandwidth.close(flow)
+
+	def downloadVideoSegmented(self, url, fileName, ranges:list=None, stream=None, userAgent=None, flow=None, quality:str=None):
+		'''
+			Downloads a video over several simultaneous connections, one per byte range.
+			Falls back to a single stream if the server ignores the Range header.
+			The progress of each range is saved to fileName + ".part.segments" so it can be resumed.
+				Parameters:
+					url: the url of the video
+					fileName: the name of the video
+					ranges: the byte ranges to download, as returned by splitRanges, None to resume the saved ones
+					stream: an already opened response for the whole file, used for a single range
+					userAgent: the user agent the CDN expects for this url
+					flow: the bandwidth Flow of stream, closed once it is no longer used
+					quality: the quality of the video, a saved download of another quality is started over
+				Returns:
+					the file name, or None if the download is incomplete
+		'''
+		partName = fileName + ".part"
+		stateName = partName + ".segments"
+		first = None
+		algorithm = self.integrity.algorithm
+		resumed = ranges is None
+		restart = False
+		lock = Lock()
+		lastSave = [0]
+		def saveState(force=False):
+			if force or time.time() - lastSave[0] > 1:
+				with open(stateName + ".tmp", 'w') as f:
+					json.dump({ "ranges" : ranges, "done" : done, "size" : fileSize, "etag" : etag, "lastModified" : lastModified,
+						"quality" : quality, "url" : url, "algorithm" : algorithm, "hashes" : hashes }, f)
+				os.replace(stateName + ".tmp", stateName)
+				lastSave[0] = time.time()
+		if ranges is None:
+			# every range opens its own transfer
+			self.bandwidth.close(flow)
+			flow = None
+			with open(stateName, 'r') as f:
+				state = json.load(f)
+			if quality is not None and state.get("quality", quality) != quality:
+				# the bytes of the previous run come from another candidate
+				print ("Segmented download of ", fileName, "restarted (the .part file is in %s quality)" % (state["quality"]), file=sys.stderr)
+				os.remove(stateName)
+				if os.path.exists(partName):
+					os.remove(partName)
+				return (self.downloadVideo(url, fileName, quality=quality, userAgent=userAgent))
+			ranges = [tuple(r) for r in state["ranges"]]
+			fileSize = ranges[-1][1] + 1
+			done = { int(start) : written for start, written in state["done"].items() }
+			etag, lastModified = state.get("etag"), state.get("lastModified")
+			# the hashes of the ranges completed by a previous run, unless it used another algorithm
+			hashes = { int(start) : digest for start, digest in state.get("hashes", {}).items() } if state.get("algorithm") == algorithm else {}
+			if not os.path.exists(partName) or os.path.getsize(partName) != fileSize:
+				# the run was interrupted before the file was preallocated, nothing was written yet
+				done = { start : 0 for start, end in ranges }
+				hashes = {}
+				self.preallocate(partName, fileSize)
+		else:
+			fileSize = ranges[-1][1] + 1
+			if stream is not None and len(ranges) > 1:
+				stream.close()
+				stream = None
+			first = stream
+			if first is None:
+				# the flow of the closed stream is given to the request of the first range
+				self.bandwidth.close(flow)
+				flow = self.bandwidth.open(urlsplit(url).netloc)
+				try:
+					first = self.request("GET", url, userAgent, stream=True, headers={ "Range": "bytes=%d-%d" % ranges[0] })
+				except Exception:
+					self.bandwidth.close(flow)
+					raise
+				if first.status_code == 200:
+					# the server ignored the Range header and is sending the whole file
+					hasher = self.integrity.newHasher()
+					self.savePartValidator(partName, fileSize, first, quality)
+					self.writeStream(first, partName, fileSize, hasher=hasher, flow=flow)
+					return (self.completePart(fileName, fileSize, first.headers.get("ETag"), first.headers.get("Last-Modified"),
+						[[0, fileSize - 1, hasher.hexdigest()]] if hasher is not None else None))
+			etag, lastModified = first.headers.get("ETag"), first.headers.get("Last-Modified")
+			done = { start : 0 for start, end in ranges }
+			hashes = {}
+			# the state is saved first, a .part file without it is never taken for a complete one
+			saveState(force=True)
+			self.preallocate(partName, fileSize)
+		# every range must come from the same version of the video, with the size of the file
+		validator = { "size" : fileSize, "etag" : etag, "lastModified" : lastModified }
+		hashers = {}
+		if algorithm is not None:
+			for start, end in ranges:
+				if start not in hashes:
+					# each range is hashed while it is written, the bytes written by a previous run are read once
+					hashers[start] = self.integrity.hashRange(partName, start, start + done[start], algorithm=algorithm)
+		slot = self.progress.start(os.path.basename(fileName).replace(".mp4", ""), fileSize, sum(done.values()))
+		def progress(start, size):
+			with lock:
+				done[start] += size
+				saveState()
+				self.progress.advance(slot, size)
+		saveState(force=True)
+		try:
+			with ThreadPoolExecutor(max_workers=len(ranges)) as executor:
+				futures = { start : executor.submit(self.withCurrentJob(self.downloadSegment), url, partName, start, end, first if start == ranges[0][0] else None,
+					partial(progress, start), done[start], userAgent, hashers.get(start), validator, flow if start == ranges[0][0] else None)
+					for start, end in ranges }
+				for start, future in futures.items():
+					future.result()
+					if start in hashers:
+						with lock:
+							hashes[start] = hashers[start].hexdigest()
+		except IntegrityError as e:
+			# the bytes written so far are useless, a resumed download starts over at once, the next try does otherwise
+			print ("Segmented download of ", fileName, "restarted (", e, ")", file=sys.stderr)
+			os.remove(stateName)
+			os.remove(partName)
+			if not resumed:
+				return (None)
+			restart = True
+		except IOError as e:
+			print ("Segmented download of ", fileName, "failed (", e, ")", file=sys.stderr)
+			if isinstance(e, RefusedError):
+				self.refusals.refused = True
+			return (None)
+		finally:
+			if os.path.exists(stateName):
+				with lock:
+					saveState(force=True)
+			self.progress.finish(slot)
+			self.bandwidth.close(flow)
+		if restart:
+			return (self.downloadVideo(url, fileName, quality=quality, userAgent=userAgent))
+		if sum(done.values()) != fileSize:
+			print ("Incomplete download : ", fileName.split('/')[-1], "(%d / %d bytes)" % (sum(done.values()), fileSize), file=sys.stderr)
+			return (None)
+		return (self.completePart(fileName, fileSize, etag, lastModified, [[start, end, hashes[start]] for start, end in ranges] if algorithm is not None else None))
+
+	def parseVideoResponse(self, content, languageSubList:list=None, video=True):
+		'''
+			Extracts the resObj of a findByVideo response with only what the downloader uses: its title, its video URLs
+			and the subtitles of languageSubList. The other subtitles, large base64 strings, are skipped without being decoded.
+				Parameters:
+					content: the findByVideo response
+					languageSubList: the subtitles to keep (englishSub, romajiSub, hiraganaSub, japaneseSub), defaults to self.subtitlesTypes
+					video: if False, the video URLs are skipped too
+				Returns:
+					the resObj, with the same structure as in the response
+		'''
+		if languageSubList is None:
+			languageSubList = self.subtitlesTypes
+		spec = { "title" : True, "subtitles" : [{ "content" : { languageSub : True for languageSub in languageSubList } }] }
+		if video:
+			spec["video"] = { "videoURLsData" : True }
+		return (selectJSON(content, { "resObj" : spec })["resObj"])
 
 	def getSubtitleFromJSON(self, resObj, languageSubList:list=None):
 		'''	Retrieves subtitle from API's resObj['resObj']['subtitles'][n]['content']['languageSub'] and uncipheres them
@@ -139,7 +916,18 @@ class AnimelonDownloader():
 				Return:
 					a list of tuples (subtitleName, subtitleContent)
 		'''
-		decryptor = subtitle_decryptor.SubtitleDecryptor()
+		encryptedSubtitles = self.getEncryptedSubtitles(resObj, languageSubList)
+		contents = self.decryptor.decrypt_many([encrypted for j, encrypted in encryptedSubtitles])
+		return (list(zip([j for j, encrypted in encryptedSubtitles], contents)))
+
+	def getEncryptedSubtitles(self, resObj, languageSubList:list=None):
+		'''	Retrieves the still encrypted subtitles from API's resObj['resObj']['subtitles'][n]['content']['languageSub']
+				Parameters:
+					resObj: the response object from the API
+					languageSubList: the list of languageSub to keep (englishSub, romajiSub, hiraganaSub, japaneseSub)
+				Return:
+					a list of tuples (subtitleName, encryptedSubtitle)
+		'''
 		if languageSubList is None:
 			languageSubList = self.subtitlesTypes
 		subtitles = []
@@ -148,7 +936,7 @@ class AnimelonDownloader():
 			subtitleList = i["content"]
 			for j in languageSubList:
 				if j in subtitleList.keys():
-					subtitles.append((j, decryptor.decrypt_subtitle(subtitleList[j])))
+					subtitles.append((j, subtitleList[j]))
 		return (subtitles)
 
 	#def saveSubtitle(self, resObj, languageSubList:list=None, savePath:str=None):
@@ -203,12 +991,96 @@ class AnimelonDownloader():
 			fileNames.append(self.saveSubtitleToFile(sub[0], sub[1], savePath=savePath, videoName=videoName))
 		return (fileNames)
 	
-	def downloadFromResObj(self, resObj, fileName=None, saveSubtitle=True, subtitlesOnly=False):
+	def getVideoCandidates(self, resObj):
+		'''
+			Lists the video URLs of the API's JSON's resObj
+				Parameters:
+					resObj: the resOBJ JSON object from the JSON response from the API
+				Returns:
+					a list of (userAgentKey, quality, videoURL) tuples, sorted by self.qualityPriorities
+		'''
+		videoURLs = resObj["video"]["videoURLsData"]
+		candidates = []
+		for quality in self.qualityPriorities:
+			for userAgentKey in videoURLs.keys():
+				videoURLsSublist = videoURLs[userAgentKey]["videoURLs"]
+				if quality in videoURLsSublist.keys():
+					candidates.append((userAgentKey, quality, videoURLsSublist[quality]))
+		return (candidates)
+
+	def probeVideoURL(self, videoURL, userAgent:str):
+		'''
+			Checks that the CDN serves a video URL by requesting its first byte only
+				Parameters:
+					videoURL: the url of the video
+					userAgent: the user agent to send
+				Returns:
+					True if the video can be downloaded
+		'''
+		try:
+			probe = self.request("GET", videoURL, userAgent, stream=True, headers={ "Range": "bytes=0-0" })
+		except Exception as e:
+			print ("Probe of", videoURL, "failed :", e, file=sys.stderr)
+			return (False)
+		probe.close()
+		return (probe.status_code in (200, 206))
+
+	def selectVideoCandidate(self, resObj, seriesName:str=None):
+		'''
+			Picks the best video URL that the CDN accepts.
+			The candidate that worked last for the series is tried alone first, otherwise every candidate is probed at once.
+				Parameters:
+					resObj: the resOBJ JSON object from the JSON response from the API
+					seriesName: the series the video belongs to
+				Returns:
+					the (userAgentKey, quality, videoURL) tuple, or None if no URL works
+		'''
+		candidates = self.getVideoCandidates(resObj)
+		if len(candidates) == 0:
+			return (None)
+		# animelon will allow us to download the video only if we send the corresponding user agent
+		#also idk why the userAgent is formatted that way in the JSON, but we have to replace this.
+		userAgents = [userAgentKey.replace("=+(dot)+=", ".") for userAgentKey, quality, videoURL in candidates]
+		# kept in the library state, shared with the other workers
+		preferred = self.libraryState.getPreferredCandidate(seriesName)
+		for i, (userAgentKey, quality, videoURL) in enumerate(candidates):
+			if (userAgentKey, quality) == preferred and self.probeVideoURL(videoURL, userAgents[i]):
+				return (candidates[i])
+		with ThreadPoolExecutor(max_workers=len(candidates)) as executor:
+			accepted = list(executor.map(self.probeVideoURL, [videoURL for userAgentKey, quality, videoURL in candidates], userAgents))
+		for i, candidate in enumerate(candidates):
+			if accepted[i]:
+				if candidate[0:2] != preferred:
+					self.libraryState.setPreferredCandidate(seriesName, *candidate[0:2])
+				return (candidate)
+		return (None)
+
+	def saveEpisodeSubtitles(self, resObj, fileName:str, videoId:str=None):
+		'''
+			Saves the subtitles of a video next to its file and records them in the library state
+				Parameters:
+					resObj: the resOBJ JSON object from the JSON response from the API
+					fileName: the name of the video file
+					videoId: the id of the video
+				Returns:
+					the list of subtitle file names
+		'''
+		subtitles = self.saveSubtitlesFromResObj(resObj, videoName=os.path.basename(fileName).replace(".mp4", ""),
+			savePath=os.path.dirname(fileName))
+		self.metrics.event("subtitles", videoId=videoId, count=len(subtitles))
+		if videoId is not None:
+			self.libraryState.record(videoId, subtitles=self.subtitlesTypes)
+		return (subtitles)
+
+	def downloadFromResObj(self, resObj, fileName=None, saveSubtitle=True, subtitlesOnly=False, seriesName:str=None, videoId:str=None):
 		''' Downloads the video and it's subtitles from the API's JSON's resObj
 				Parameters:
 					resObj: the resOBJ JSON object from the JSON response from the API
 					fileName: the name of the video file to be saved
 					saveSubtitle: whether to save the subtitle or not
+					subtitlesOnly: if True, only the subtitles are saved
+					seriesName: the series the video belongs to, used to remember which video URL works
+					videoId: the id of the video, used to record it in the library state
 				Returns:
 					the file name
 		'''
@@ -216,30 +1088,47 @@ class AnimelonDownloader():
 		if fileName is None:
 			fileName = os.path.join(self.savePath, title + ".mp4")
 		if (saveSubtitle):
-			self.saveSubtitlesFromResObj(resObj, videoName=os.path.basename(fileName).replace(".mp4", ""),
-				savePath=os.path.dirname(fileName))
-		if (self.subtitlesOnly):
+			self.saveEpisodeSubtitles(resObj, fileName, videoId)
+		if (subtitlesOnly or self.subtitlesOnly):
 			return (None)
-		video = (resObj["video"])
-		videoURLs = video["videoURLsData"]
-		time.sleep(self.sleepTime)
-		for userAgentKey in videoURLs.keys():
-			# animelon will allow us to download the video only if we send the corresponding user agent
-			#also idk why the userAgent is formatted that way in the JSON, but we have to replace this.
-			self.updateUserAgent(userAgentKey.replace("=+(dot)+=", "."))
-			mobileUrlList = videoURLs[userAgentKey]
-			videoURLsSublist = mobileUrlList["videoURLs"]
-			for quality in self.qualityPriorities:
-				if quality in videoURLsSublist.keys():
-					videoURL = videoURLsSublist[quality]
-					videoStream = self.session.get(videoURL, stream=True)
-					if videoStream.status_code == 200:
-						self.downloadVideo(videoURL, fileName=fileName, stream=videoStream, quality=quality)
-						print ("Finished downloading ", fileName)
-						return (fileName)
-		return (None)
+		if self.isDownloaded(fileName):
+			print ("Already downloaded ", fileName)
+			return (fileName)
+		if self.contentStore is not None and videoId is not None:
+			method = self.contentStore.materialize(videoId, fileName)
+			if method is not None:
+				# the video is already in the store, from another series or savePath
+				print ("Linked from the store (%s) " % method, fileName)
+				self.integrity.save(fileName, os.path.getsize(fileName))
+				self.libraryState.record(videoId, path=fileName, size=os.path.getsize(fileName))
+				self.metrics.event("video", videoId=videoId, file=os.path.basename(fileName), host=None, quality=None, userAgentKey=None,
+					result="linked", seconds=0, size=os.path.getsize(fileName))
+				return (fileName)
+		candidate = self.selectVideoCandidate(resObj, seriesName)
+		if candidate is None:
+			self.refusals.refused = True
+			return (None)
+		userAgentKey, quality, videoURL = candidate
+		start = time.time()
+		file = self.downloadVideo(videoURL, fileName=fileName, quality=quality, userAgent=userAgentKey.replace("=+(dot)+=", "."))
+		self.metrics.event("video", videoId=videoId, file=os.path.basename(fileName), host=urlsplit(videoURL).netloc, quality=quality,
+			userAgentKey=userAgentKey, result="failed" if file is None else "completed", seconds=round(time.time() - start, 3),
+			size=os.path.getsize(file) if file is not None else None)
+		if file is None:
+			return (None)
+		if self.contentStore is not None and videoId is not None:
+			if self.contentStore.add(videoId, fileName) is None:
+				print ("Could not link ", fileName, "to the store, it must be on the same file system", file=sys.stderr)
+			else:
+				# the file may now be a link to an older object with the same bytes
+				self.integrity.touch(fileName)
+		if videoId is not None:
+			self.libraryState.record(videoId, path=fileName, size=os.path.getsize(fileName), quality=quality)
+		print ("Finished downloading ", fileName)
+		return (fileName)
 
-	def downloadFromVideoPage(self, url=None, id=None, fileName=None, background=False, saveSubtitle=True):
+	def downloadFromVideoPage(self, url=None, id=None, fileName=None, background=False, saveSubtitle=True, seriesName:str=None, subtitlesOnly=False,
+							resObj=None):
 		''' Downloads a video from the video page or it's id
 				Parameters:
 					url: the video page url (https://animelon.com/video/5b5412ce33107581e4f672a5)
@@ -247,59 +1136,73 @@ class AnimelonDownloader():
 					fileName: the file name to save the video to
 					background: if True, the download will be started in the background
 					saveSubtitle: if True, the subtitle will be saved
+					seriesName: the series the video belongs to, used to remember which video URL works
+					subtitlesOnly: if True, only the subtitles are saved
+					resObj: the resObj of the video if it was already fetched, it is fetched again for the retries
 				Returns:
-					the file name
+					the file name, or the background task (a Process, or a Future of the file name with the thread engine)
 		'''
 		assert(url is not None or id is not None)
 		if background:
-			self.launchBackgroundTask(self.downloadFromVideoPage, (url, id, fileName, False))
+			task = self.launchBackgroundTask(self.downloadFromVideoPage, (url, id, fileName, False, saveSubtitle, seriesName, subtitlesOnly, resObj))
 			time.sleep(self.sleepTime)
-			return (None)
+			return (task)
 		if url is None:
 			url = self.baseURL + "video/" + id
 		if id is None:
 			id = url.split("/")[-1]
 		
 		apiUrl = self.apiVideoFormat % (id)
+		refresh = False
+		start = time.time()
 		for tries in range(self.maxTries):
-			response = get(apiUrl, headers=self.headers)
-			if response.status_code == 200:		
-				jsonsed = json.loads(response.content)
-				file = self.downloadFromResObj(jsonsed["resObj"], fileName=fileName, saveSubtitle=saveSubtitle)
-				if file is not None:
+			if resObj is None:
+				content = self.getAPIResponse(apiUrl, self.videoCacheTTL, maxTries=1, refresh=refresh)
+				resObj = self.parseVideoResponse(content, None if saveSubtitle else [], video=not (subtitlesOnly or self.subtitlesOnly)) \
+					if content is not None else None
+			if resObj is not None:
+				self.refusals.refused = False
+				file = self.downloadFromResObj(resObj, fileName=fileName, saveSubtitle=saveSubtitle, subtitlesOnly=subtitlesOnly,
+					seriesName=seriesName, videoId=id)
+				if file is not None or subtitlesOnly or self.subtitlesOnly:
+					self.metrics.event("episode", videoId=id, file=file, result="completed", tries=tries + 1, seconds=round(time.time() - start, 3))
 					return (file)
+				if self.refusals.refused or not os.path.exists((fileName or os.path.join(self.savePath, resObj["title"] + ".mp4")) + ".part"):
+					# the CDN refused the links or nothing was transferred, the cached CDN links may have expired
+					refresh = True
+				# the subtitles were saved by the first try, the next ones skip them in the response
+				saveSubtitle = False
 				print ("Failed to download ", fileName, "retrying ... (", self.maxTries - tries, " tries left)"),
-				time.sleep(self.sleepTime * tries)
+				self.metrics.event("retry", videoId=id, tries=tries + 1, refresh=refresh)
+				resObj = None
+				self.backoff(tries)
+			elif self.offline:
+				break
 		print ("Failed to download ", fileName)
+		self.metrics.event("episode", videoId=id, file=fileName, result="failed", tries=self.maxTries, seconds=round(time.time() - start, 3))
 		return (None)
 
-	def getEpisodeList(self, seriesURL):
+	def getEpisodeList(self, seriesURL, refresh=False):
 		''' 
 			Returns a list of all the episodes of a series from the series page
 			ex: https://animelon.com/series/Shoujo%20Shuumatsu%20Ryokou%20(Girls'%20Last%20Tour)
-			
+			If refresh is True, the cached series is not used.
 		'''
 		seriesName = seriesURL.rsplit('/', 1)[-1]
 		url = self.baseURL + "api/series/" + seriesName
-		statusCode = 403
-		tries = 0
-		while statusCode != 200 and tries < self.maxTries:
-			response = self.session.get(url)
-			statusCode = response.status_code
-			tries += 1
-			time.sleep(0.5)
-		if (statusCode != 200):
+		content = self.getAPIResponse(url, self.seriesCacheTTL, refresh=refresh)
+		if (content is None):
 			print ("Error getting anime info")
 			return (None)
 		try:
-			jsoned = json.loads(response.text)
+			jsoned = json.loads(content)
 			resObj = jsoned["resObj"]
 			if resObj is None and '\\' in seriesURL:
 				seriesURL = seriesURL.replace('\\', '')
-				return ((self.getEpisodeList(seriesURL)))
+				return ((self.getEpisodeList(seriesURL, refresh)))
 			assert (resObj is not None)
 		except Exception as e:
-			print ("Error: Could not parse anime info :\n", e, url , "\n", response, response.content, file=sys.stderr)
+			print ("Error: Could not parse anime info :\n", e, url , "\n", content, file=sys.stderr)
 			return (None)
 		return (resObj)
 
@@ -318,6 +1221,172 @@ class AnimelonDownloader():
 		os.makedirs(self.savePath, exist_ok=True)
 		return (self.savePath)
 
+	def moveEpisodeFiles(self, oldFileName, fileName):
+		'''
+			Moves a video and its subtitles to a new file name
+				Parameters:
+					oldFileName: the current file name of the video
+					fileName: the new file name of the video
+		'''
+		oldDirectory, oldName = os.path.split(oldFileName)
+		oldName = oldName.replace(".mp4", "")
+		newName = os.path.basename(fileName).replace(".mp4", "")
+		for name in os.listdir(oldDirectory):
+			if name.startswith(oldName + "."):
+				os.replace(os.path.join(oldDirectory, name), os.path.join(os.path.dirname(fileName), newName + name[len(oldName):]))
+
+	def planEpisodeSync(self, videoId:str, fileName:str):
+		'''
+			Compares an episode with the library state to know what is left to download
+				Parameters:
+					videoId: the id of the video
+					fileName: where the video should be
+				Returns:
+					None if the episode is up to date, "subtitles" if only subtitles are missing, "video" if the video has to be downloaded
+		'''
+		owner = self.libraryState.getVideoId(fileName)
+		if owner not in (None, videoId) and os.path.isfile(fileName):
+			# the episode was replaced or renumbered, the file in its place is another video, moved aside until its episode claims it
+			ownerState = self.libraryState.get(owner)
+			asideName = os.path.join(os.path.dirname(fileName), "." + owner + ".mp4")
+			print ("Moving ", fileName, "aside to", asideName, ", it is the video", owner)
+			self.moveEpisodeFiles(fileName, asideName)
+			self.libraryState.record(owner, path=asideName, size=ownerState["size"], quality=ownerState["quality"])
+		state = self.libraryState.get(videoId)
+		# with a content store, the same video under another series or savePath is linked from the store instead of moved
+		if state is not None and state["path"] not in (None, fileName) and os.path.isfile(state["path"]) and not os.path.exists(fileName) \
+				and self.contentStore is None:
+			# the episode was renumbered or its series renamed, no need to download it again
+			print ("Moving ", state["path"], "to", fileName)
+			self.moveEpisodeFiles(state["path"], fileName)
+			self.libraryState.record(videoId, path=fileName, size=state["size"], quality=state["quality"])
+			state["path"] = fileName
+		if not self.subtitlesOnly:
+			if state is None or state["path"] != fileName:
+				if not self.isDownloaded(fileName):
+					return ("video")
+				# downloaded before the library state existed, its subtitles are unknown
+				self.libraryState.record(videoId, path=fileName, size=os.path.getsize(fileName))
+				return ("subtitles")
+			if not os.path.isfile(fileName) or os.path.getsize(fileName) != state["size"] or not self.isDownloaded(fileName):
+				print ("Changed on disk, downloading again : ", fileName)
+				if os.path.isfile(fileName):
+					os.remove(fileName)
+				return ("video")
+		if state is None or not set(self.subtitlesTypes) <= state["subtitles"]:
+			return ("subtitles")
+		return (None)
+
+	def planEpisode(self, videoId:str, fileName:str):
+		'''
+			Returns:
+				None if the episode is already downloaded, "subtitles" if only its subtitles are missing, "video" if the video has to be downloaded
+		'''
+		if self.sync:
+			return (self.planEpisodeSync(videoId, fileName))
+		if not self.subtitlesOnly and self.isDownloaded(fileName):
+			return (None)
+		return ("video")
+
+	def getEpisodeFileName(self, title:str, seasonNumber:int, index:int, savePath:str):
+		'''
+			Returns:
+				the file name of the index-th episode of a season
+		'''
+		return (os.path.join(savePath, title + " S" + str(seasonNumber) + "E" + str(index) + ".mp4"))
+
+	def listEpisodes(self, url:str, seasonsToDownload:list=None, episodesToDownload:dict=None):
+		'''
+			Lists the videos of a series (/series/) or video (/video/) page url without downloading them
+				Parameters:
+					url: url of the video or series page
+					seasonsToDownload: list of seasons to keep
+					episodesToDownload: dict of episodes to keep, keys are season number, values are list of episode numbers
+				Returns:
+					a list of (videoId, fileName, seriesName) tuples, fileName and seriesName are None for a video page
+		'''
+		try:
+			type = url.split('/')[3]
+		except IndexError:
+			print('Error: Bad URL : "%s"' % url, file=sys.stderr)
+			return ([])
+		if type == 'video':
+			return ([(url.split("/")[-1], None, None)])
+		if type != 'series':
+			print('Error: Unknown URL type "%s"' % type, file=sys.stderr)
+			return ([])
+		resObj = self.getEpisodeList(url, refresh=self.sync)
+		if resObj is None:
+			return ([])
+		title = resObj["_id"]
+		episodes = []
+		for season in resObj["seasons"]:
+			seasonNumber = int(season["number"])
+			if seasonsToDownload is None or seasonNumber in seasonsToDownload:
+				seasonSavePath = os.path.join(self.savePath, title, "S%.2d" % seasonNumber)
+				for index, episode in enumerate(season["episodes"], 1):
+					if episodesToDownload is None or index in episodesToDownload[seasonNumber]:
+						episodes.append((episode, self.getEpisodeFileName(title, seasonNumber, index, seasonSavePath), title))
+		return (episodes)
+
+	def harvestSubtitles(self, URLs:list, seasonsToDownload:list=None, episodesToDownload:dict=None):
+		'''
+			Downloads only the subtitles of a list of series or video page URLs, as fast as the API allows:
+			the findByVideo responses are fetched concurrently, decrypted by a pool of subtitleWorkers processes
+			and the files are written as the results come in.
+				Parameters:
+					URLs: list of URLs
+					seasonsToDownload: list of seasons to download
+					episodesToDownload: dict of episodes to download, keys are season number, values are list of episode numbers
+				Returns:
+					the list of saved subtitle file names
+		'''
+		episodes = []
+		for url in URLs:
+			for videoId, fileName, seriesName in self.listEpisodes(url, seasonsToDownload, episodesToDownload):
+				state = self.libraryState.get(videoId) if self.sync else None
+				if state is not None and set(self.subtitlesTypes) <= state["subtitles"]:
+					continue
+				episodes.append((videoId, fileName))
+		print ("Harvesting the subtitles of %d videos" % len(episodes))
+		def fetch(videoId):
+			content = self.getAPIResponse(self.apiVideoFormat % videoId, self.videoCacheTTL)
+			if content is None:
+				return (None)
+			resObj = self.parseVideoResponse(content, video=False)
+			return ((resObj["title"], self.getEncryptedSubtitles(resObj)))
+		fileNames = []
+		from concurrent.futures import ProcessPoolExecutor
+		with ThreadPoolExecutor(max_workers=max(8, self.processMax)) as fetchers, ProcessPoolExecutor(max_workers=self.subtitleWorkers) as decryptors:
+			tasks = { fetchers.submit(fetch, videoId) : (fetch, videoId, fileName) for videoId, fileName in episodes }
+			# the subtitles of an episode are saved as soon as they are decrypted, and then released
+			while len(tasks) > 0:
+				done, pending = wait(tasks, return_when=FIRST_COMPLETED)
+				for future in done:
+					task, videoId, fileName = tasks.pop(future)
+					try:
+						result = future.result()
+					except Exception as e:
+						result = None
+						print ("Error: ", e, file=sys.stderr)
+					if result is None:
+						print ("Failed to %s the subtitles of " % ("get" if task is fetch else "decrypt"), videoId, file=sys.stderr)
+						continue
+					if task is fetch:
+						title, encryptedSubtitles = result
+						if fileName is None:
+							fileName = os.path.join(self.savePath, title + ".mp4")
+						tasks[decryptors.submit(decryptSubtitles, encryptedSubtitles)] = (decryptSubtitles, videoId, fileName)
+						continue
+					os.makedirs(os.path.dirname(fileName) or ".", exist_ok=True)
+					for languageSub, content in result:
+						fileNames.append(self.saveSubtitleToFile(languageSub, content, videoName=os.path.basename(fileName).replace(".mp4", ""),
+							savePath=os.path.dirname(fileName)))
+					self.libraryState.record(videoId, subtitles=self.subtitlesTypes)
+					self.metrics.event("subtitles", videoId=videoId, count=len(result))
+		print ("Saved %d subtitles" % len(fileNames))
+		return (fileNames)
+
 	def downloadEpisodes(self, episodes:dict, title:str, episodesToDownload:dict=None, seasonNumber:int=0, savePath:str="./"):
 		'''
 			Downloads the episodes from the episodes dict
@@ -333,22 +1402,78 @@ class AnimelonDownloader():
 		'''
 		index = 0
 		downloadedEpisodes = []
+		pipeline = []
 		for episode in episodes:
 			index += 1
 			if episodesToDownload is None or index in episodesToDownload[seasonNumber]:
-				self.waitForFreeProcess()
-				url = self.baseURL + "video/" + episode
-				fileName = title + " S" + str(seasonNumber) + "E" + str(index) + ".mp4"
 				os.makedirs(savePath, exist_ok=True)
-				fileName = os.path.join(savePath, fileName)
-				print(fileName, " : ", url)
-				try:
-					self.downloadFromVideoPage(url, fileName=fileName, background=True)
+				fileName = self.getEpisodeFileName(title, seasonNumber, index, savePath)
+				action = self.planEpisode(episode, fileName)
+				if action is None:
+					print(fileName, " : already downloaded, skipping")
 					downloadedEpisodes.append(index)
+					continue
+				pipeline.append((index, (episode, fileName, title, action)))
+		started = self.downloadEpisodeList([episode for index, episode in pipeline])
+		downloadedEpisodes += [index for index, episode in pipeline if episode[0] in started]
+		return (sorted(downloadedEpisodes))
+
+	def prefetchEpisode(self, videoId:str, fileName:str):
+		'''
+			Fetches the metadata of an upcoming episode and saves its subtitles, ahead of its video
+				Parameters:
+					videoId: the id of the video
+					fileName: the name of the video file
+				Returns:
+					the resObj of the video, or None if it could not be fetched
+		'''
+		content = self.getAPIResponse(self.apiVideoFormat % videoId, self.videoCacheTTL, maxTries=1)
+		if content is None:
+			return (None)
+		resObj = self.parseVideoResponse(content)
+		self.saveEpisodeSubtitles(resObj, fileName, videoId)
+		# the worker of the video doesn't need the subtitles, they are saved
+		return (dict(resObj, subtitles=[]))
+
+	def downloadEpisodeList(self, episodes:list):
+		'''
+			Downloads episodes through a pipeline: threads fetch the metadata and save the subtitles of the next `prefetch` episodes
+			while the background workers transfer the videos of the previous ones, so the transfers never wait for the API
+				Parameters:
+					episodes: a list of (videoId, fileName, seriesName, action) tuples, action as returned by planEpisode
+				Returns:
+					the set of the videoIds whose download was started
+		'''
+		started = set()
+		def dispatch(episode, future):
+			videoId, fileName, seriesName, action = episode
+			url = self.baseURL + "video/" + videoId
+			resObj = None
+			if future is not None:
+				try:
+					resObj = future.result()
 				except Exception as e:
-					print("Error: Failed to download " + url, file=sys.stderr)
-					print(e)
-		return (downloadedEpisodes)
+					print("Error: Failed to prefetch " + url, "(", e, ")", file=sys.stderr)
+			self.waitForFreeProcess()
+			print(fileName, " : ", url, "(subtitles only)" if action == "subtitles" else "")
+			try:
+				# once prefetched, the subtitles are already saved and only the video needs a worker
+				self.downloadFromVideoPage(url, fileName=fileName, background=resObj is None or action == "video", seriesName=seriesName,
+					subtitlesOnly=action == "subtitles", saveSubtitle=resObj is None, resObj=resObj)
+				started.add(videoId)
+			except Exception as e:
+				print("Error: Failed to download " + url, file=sys.stderr)
+				print(e)
+		with ThreadPoolExecutor(max_workers=max(1, self.prefetch)) as prefetcher:
+			upcoming = deque()
+			for episode in episodes:
+				upcoming.append((episode, prefetcher.submit(self.prefetchEpisode, episode[0], episode[1]) if self.prefetch > 0 else None))
+				if len(upcoming) > self.prefetch:
+					# blocks until a worker is free, while the next episodes are prefetched
+					dispatch(*upcoming.popleft())
+			while len(upcoming) > 0:
+				dispatch(*upcoming.popleft())
+		return (started)
 
 #episodesToDownload = {season_i : [episode_j, episode_j+1]}
 	def downloadSeries(self, url, seasonsToDownload:list=None, episodesToDownload:dict=None, background=False):
@@ -365,7 +1490,7 @@ class AnimelonDownloader():
 						key: season number
 						value: list of downloaded episodes
 		'''
-		resObj = self.getEpisodeList(url)
+		resObj = self.getEpisodeList(url, refresh=self.sync)
 		if resObj is None:
 			return ()
 		title = resObj["_id"]
@@ -396,19 +1521,19 @@ class AnimelonDownloader():
 					episodesToDownload: dict of episodes to download, keys are season number, values are list of episode numbers
 					parallell: if true, the downloads will be launched in a background process
 				Returns:
-					Either a dict of downloaded episodes or 				
+					the dict of downloaded episodes of a series, the file name or background task of a video, or None for a bad URL
 		'''
 		try:
 			type = url.split('/')[3]
 		except IndexError:
-			print('Error: Bad URL : "%s"' % url)
-			return ()
+			print('Error: Bad URL : "%s"' % url, file=sys.stderr)
+			return (None)
 		if type == 'series':
-			dl = downloader.downloadSeries(url, seasonsToDownload=seasonsToDownload, episodesToDownload=episodesToDownload)
+			return (self.downloadSeries(url, seasonsToDownload=seasonsToDownload, episodesToDownload=episodesToDownload))
 		elif type == 'video':
-			downloader.downloadFromVideoPage(url, background=parallell)
-		else:
-			print('Error: Unknown URL type "%"' % type, file=sys.stderr)
+			return (self.downloadFromVideoPage(url, background=parallell))
+		print('Error: Unknown URL type "%s"' % type, file=sys.stderr)
+		return (None)
 
 
 	def downloadFromURLList(self, URLs:list, seasonsToDownload:list=None, episodesToDownload:dict=None, background=False):
@@ -429,21 +1554,204 @@ class AnimelonDownloader():
 			self.waitForFreeProcess(1)
 		return (dlEpisodes)
 
+	def planQueue(self, URLs:list, queue:WorkQueue, seasonsToDownload:list=None, episodesToDownload:dict=None):
+		'''
+			Adds one job per episode of the URLs to a work queue, for workers on any machine to download
+				Parameters:
+					URLs: list of series or video page URLs
+					queue: the work queue
+					seasonsToDownload: list of seasons to queue
+					episodesToDownload: dict of episodes to queue, keys are season number, values are list of episode numbers
+				Returns:
+					the number of jobs added, the episodes already queued are not added again
+		'''
+		jobs = []
+		for url in URLs:
+			for videoId, fileName, seriesName in self.listEpisodes(url, seasonsToDownload, episodesToDownload):
+				# the workers may mount the library elsewhere, paths are relative to their savePath
+				jobs.append((videoId, os.path.relpath(fileName, self.savePath) if fileName is not None else "", seriesName))
+		added = queue.add(jobs)
+		print ("Queued %d new episodes (%d already queued) to %s" % (added, len(jobs) - added, queue.path))
+		return (added)
+
+	def workQueue(self, queue:WorkQueue, leaseTime:float=300, pollInterval:float=10):
+		'''
+			Downloads the episodes of a work queue with processMax workers, until no job is left
+				Parameters:
+					queue: the work queue
+					leaseTime: the number of seconds a worker keeps a job without sending a heartbeat, before another worker may claim it
+					pollInterval: the number of seconds an idle worker waits for the jobs leased by other workers to be done or abandoned
+				Returns:
+					the number of jobs by status once the queue is empty
+		'''
+		for index in range(self.processMax):
+			self.launchBackgroundTask(self.runQueueWorker, (queue, leaseTime, pollInterval))
+		self.waitForFreeProcess(1)
+		counts = queue.counts()
+		print ("Queue %s : %d done, %d failed, %d pending, %d leased" % (queue.path, counts["done"], counts["failed"], counts["pending"], counts["leased"]))
+		return (counts)
+
+	def runQueueWorker(self, queue:WorkQueue, leaseTime:float=300, pollInterval:float=10):
+		'''
+			Claims and downloads the jobs of a work queue one by one, renewing the lease of each job from a thread while it downloads
+				Parameters:
+					queue: the work queue
+					leaseTime: the number of seconds a job is leased for
+					pollInterval: the number of seconds to wait when every job left is leased by another worker
+				Returns:
+					the number of jobs this worker completed
+		'''
+		import socket
+		worker = "%s:%d:%d" % (socket.gethostname(), os.getpid(), get_ident())
+		completed = 0
+		while True:
+			job = queue.claim(worker, leaseTime)
+			if job is None:
+				if queue.counts()["leased"] == 0:
+					return (completed)
+				# a worker may still abandon its job, which is claimed again once its lease expires
+				time.sleep(pollInterval)
+				continue
+			stopped = Event()
+			def heartbeat():
+				while not stopped.wait(leaseTime / 3):
+					if not queue.heartbeat(job["id"], worker, leaseTime):
+						print ("Lease of ", job["videoId"], "lost, another worker may download it too", file=sys.stderr)
+						return
+			heartbeatThread = Thread(target=heartbeat, daemon=True)
+			heartbeatThread.start()
+			start = time.time()
+			error = None
+			try:
+				fileName = os.path.join(self.savePath, job["path"]) if job["path"] else None
+				action = self.planEpisode(job["videoId"], fileName) if fileName is not None else "video"
+				if action is not None:
+					if fileName is not None:
+						os.makedirs(os.path.dirname(fileName), exist_ok=True)
+					file = self.downloadFromVideoPage(id=job["videoId"], fileName=fileName, seriesName=job["seriesName"], subtitlesOnly=action == "subtitles")
+					if file is None and action == "video" and not self.subtitlesOnly:
+						error = "download failed"
+			except Exception as e:
+				error = repr(e)
+			finally:
+				stopped.set()
+				heartbeatThread.join()
+			if error is None:
+				queue.complete(job["id"], worker)
+				completed += 1
+			else:
+				print ("Job ", job["videoId"], "failed on", worker, "(", error, ")", file=sys.stderr)
+				queue.fail(job["id"], worker, error)
+			self.metrics.event("job", videoId=job["videoId"], worker=worker, tries=job["tries"], result="failed" if error else "completed",
+				seconds=round(time.time() - start, 3))
+
+	def verifyLibrary(self, path:str=None, deep=False):
+		'''
+			Checks the downloaded videos against their integrity records, and flags the corrupt ones
+			so that the next download of their series replaces them
+				Parameters:
+					path: the directory to check, defaults to savePath
+					deep: if False, only the size of each video is checked, if True its recorded hashes are computed again
+				Returns:
+					a dict with the lists of "valid", "corrupt" and "unverified" (without record) videos
+		'''
+		fileNames = set()
+		for directory, directories, names in os.walk(path or self.savePath):
+			for name in names:
+				if name.endswith(".mp4"):
+					fileNames.add(os.path.join(directory, name))
+				elif name.endswith(".mp4.integrity"):
+					fileNames.add(os.path.join(directory, name[:-len(".integrity")]))
+		results = { "valid" : [], "corrupt" : [], "unverified" : [] }
+		# hashlib releases the GIL, the files are hashed in parallel
+		with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as executor:
+			for fileName, (valid, reason) in zip(sorted(fileNames), executor.map(partial(self.integrity.check, deep=deep), sorted(fileNames))):
+				if valid is None:
+					results["unverified"].append(fileName)
+				elif valid:
+					results["valid"].append(fileName)
+				else:
+					print ("Corrupt video : ", fileName, "(", reason, ")", file=sys.stderr)
+					self.integrity.markCorrupt(fileName, reason)
+					results["corrupt"].append(fileName)
+		print ("Verified %d videos : %d valid, %d corrupt, %d without integrity record" % (len(fileNames),
+			len(results["valid"]), len(results["corrupt"]), len(results["unverified"])))
+		return (results)
+
 if __name__ == "__main__":
 	parser = argparse.ArgumentParser(description='Downloads videos from animelon.com')
-	parser.add_argument('videoURLs', metavar='videoURLs', type=str, nargs='+',
+	parser.add_argument('videoURLs', metavar='videoURLs', type=str, nargs='*',
 						help='A series or video page URL, eg: https://animelon.com/series/Death%%20Note or https://animelon.com/video/579b1be6c13aa2a6b28f1364')
-	parser.add_argument("--sleepTime", '-d', metavar='delay', help="Sleep time between each download (defaults to 5)", type=float, default=5)
+	parser.add_argument("--sleepTime", '-d', metavar='delay', help="Minimum sleep time between starting two downloads, requests are already paced by --apiRate and --cdnRate (defaults to 0)", type=float, default=0)
 	parser.add_argument("--savePath", '-f', metavar='savePath', help='Path to save', type=str, default="")
 	parser.add_argument('--forks', metavar='forks', help='Number of worker process for simultaneous downloads (defaults to 1)', type=int, default=1)
+	parser.add_argument('--engine', metavar='engine', help='How simultaneous downloads are run: "process" forks a process per download, "thread" runs --forks downloads in one process (defaults to process)',
+		type=str, choices=("process", "thread"), default="process")
 	parser.add_argument('--maxTries', metavar='maxTries', help='Maximum number of retries in case of failed requests (defaults to 5)', type=int, default=5)
-	parser.add_argument('--sleepTimeRetry', metavar='sleepTimeRetry', help='Sleep time between retries (defaults to 5)', type=float, default=5)
+	parser.add_argument('--sleepTimeRetry', metavar='sleepTimeRetry', help='First backoff before a retry, doubled after each failure (defaults to 5)', type=float, default=5)
+	parser.add_argument('--apiRate', metavar='apiRate', help='Maximum API requests per second across all workers, lowered automatically when throttled (defaults to 5, 0 for no limit)', type=float, default=5)
+	parser.add_argument('--cdnRate', metavar='cdnRate', help='Maximum CDN requests per second across all workers, lowered automatically when throttled (defaults to 20, 0 for no limit)', type=float, default=20)
 	parser.add_argument('--subtitlesType', metavar='subtitlesType', help='Subtitles types to download (englishSub, romajiSub, hiraganaSub, japaneseSub, none)',\
 		type=str, default=("englishSub", "romajiSub", "hiraganaSub", "japaneseSub"), nargs='+')
 	parser.add_argument('--subtitlesOnly', help='Only downloads subtitles', action='store', default=False, const=True, nargs='?')
+	parser.add_argument('--subtitleWorkers', metavar='subtitleWorkers', help='Number of processes decrypting subtitles with --subtitlesOnly (defaults to the number of cores)', type=int, default=None)
+	parser.add_argument('--noCache', help='Do not keep the API responses in a local cache', action='store_true')
+	parser.add_argument('--offline', help='Only use the API responses already in the local cache', action='store_true')
+	parser.add_argument('--seriesCacheTTL', metavar='seriesCacheTTL', help='Seconds before a cached series is fetched again (defaults to 86400)', type=float, default=24 * 3600)
+	parser.add_argument('--videoCacheTTL', metavar='videoCacheTTL', help='Seconds before a cached video page and its CDN links are fetched again (defaults to 3600)', type=float, default=3600)
+	parser.add_argument('--urlFile', metavar='urlFile', help='File to read more URLs from, one per line, "-" reads them from stdin as they come (can be repeated, duplicated URLs are skipped)', type=str, action='append', default=[])
+	parser.add_argument('--prefetch', metavar='prefetch', help='Number of upcoming episodes whose metadata and subtitles are fetched while the videos before them download (defaults to 4, 0 disables it)', type=int, default=4)
+	parser.add_argument('--sync', help='Only download the episodes and subtitles that are new or changed since the last run', action='store_true')
+	parser.add_argument('--maxBandwidth', metavar='maxBandwidth', help='Maximum download rate of all the videos together in MB/s, shared fairly between the running downloads (defaults to 0, no limit)', type=float, default=0)
+	parser.add_argument('--bandwidthFile', metavar='bandwidthFile', help='File holding the maximum download rate in MB/s, edit it to change the rate while downloading (overrides --maxBandwidth once it exists)', type=str, default=None)
+	parser.add_argument('--maxHostConnections', metavar='maxHostConnections', help='Maximum number of simultaneous video transfers from a single CDN host, counting every segment (defaults to 0, no limit)', type=int, default=0)
+	parser.add_argument('--store', metavar='storePath', help='Content-addressed store keeping each distinct video once, the episode files become reflinks or hardlinks to it so a video shared by several series or savePaths is never downloaded or stored twice (it must be on the same file system as savePath)', type=str, default=None)
+	parser.add_argument('--linkMode', metavar='linkMode', help='How episode files are linked to the store: "reflink", "hardlink", or "auto" (default) which tries a reflink first', type=str, default="auto", choices=["auto", "reflink", "hardlink"])
+	parser.add_argument('--queue', metavar='queuePath', help='SQLite work queue shared by downloaders on several machines (eg. on a shared file system): the episodes of the URLs are queued, then downloaded by whichever worker claims them first, without URLs this downloader only works on the queue', type=str, default=None)
+	parser.add_argument('--plan', help='With --queue, only queue the episodes of the URLs without downloading them', action='store_true')
+	parser.add_argument('--leaseTime', metavar='leaseTime', help='Seconds a queue worker keeps an episode without heartbeat before another worker may claim it (defaults to 300)', type=float, default=300)
+	parser.add_argument('--metrics', metavar='metrics', help='Append the events of the run (requests, transfers, retries, episodes) and its summary to this JSON-lines file', type=str, default=None)
+	parser.add_argument('--prometheus', metavar='prometheus', help='Write the summary of the run to this Prometheus textfile, requires --metrics', type=str, default=None)
+	parser.add_argument('--noProgress', help='Do not draw the progress line of the running downloads', action='store_true')
+	parser.add_argument('--chunkSize', metavar='chunkSize', help='Size of the buffer each download reads into and writes from, in MB (defaults to 4)', type=float, default=4)
+	parser.add_argument('--fsync', help='Flush each video to the disk before renaming it from its .part file', action='store_true')
+	parser.add_argument('--hash', metavar='algorithm', help='Hash each video while it is written (sha256, md5, blake2b...) and record it next to the video (defaults to none, only the size, ETag and Last-Modified are recorded)', type=str, default=None)
+	parser.add_argument('--verify', metavar='check', help='Check the videos of savePath against their integrity records before downloading, the corrupt ones are downloaded again: "size" (default) reads their size and hashes only those modified since their download, "hash" hashes them all again', nargs='?', const="size", choices=["size", "hash"], default=None)
+	parser.add_argument('--segments', metavar='segments', help='Number of simultaneous byte ranges used to download a single video (defaults to 1)', type=int, default=1)
+	parser.add_argument('--minSegmentSize', metavar='minSegmentSize', help='Minimum size of a byte range in MB (defaults to 8)', type=float, default=8)
 	args = parser.parse_args()
-	urls = args.videoURLs
+	hasURLs = len(args.videoURLs) > 0 or len(args.urlFile) > 0
+	urls = readURLs(args.videoURLs, args.urlFile)
+	if not hasURLs and args.verify is None and (args.queue is None or args.plan):
+		parser.error("at least one videoURL is required, unless --verify or --queue is used")
 	downloader = AnimelonDownloader(savePath=args.savePath, processMax=args.forks, maxTries=args.maxTries,
-		sleepTime=args.sleepTime, sleepTimeRetry=args.sleepTimeRetry, subtitlesTypes=args.subtitlesType, subtitlesOnly=args.subtitlesOnly)
-	downloader.downloadFromURLList(urls)
+		sleepTime=args.sleepTime, sleepTimeRetry=args.sleepTimeRetry, subtitlesTypes=args.subtitlesType, subtitlesOnly=args.subtitlesOnly,
+		segments=args.segments, minSegmentSize=int(args.minSegmentSize * 1024 ** 2), engine=args.engine,
+		useCache=not args.noCache, seriesCacheTTL=args.seriesCacheTTL, videoCacheTTL=args.videoCacheTTL, offline=args.offline,
+		sync=args.sync, apiRate=args.apiRate, cdnRate=args.cdnRate, subtitleWorkers=args.subtitleWorkers,
+		metricsPath=args.metrics, prometheusPath=args.prometheus, showProgress=not args.noProgress,
+		chunkSize=int(args.chunkSize * 1024 ** 2), fsync=args.fsync, hashAlgorithm=args.hash, prefetch=args.prefetch,
+		storePath=args.store, linkMode=args.linkMode, maxBandwidth=args.maxBandwidth * 1024 ** 2, maxHostConnections=args.maxHostConnections,
+		bandwidthPath=args.bandwidthFile)
+	if args.verify is not None:
+		downloader.verifyLibrary(deep=args.verify == "hash")
+	if args.queue is not None:
+		queue = WorkQueue(args.queue, maxTries=args.maxTries)
+		if hasURLs:
+			downloader.planQueue(urls, queue)
+		if not args.plan:
+			downloader.workQueue(queue, leaseTime=args.leaseTime)
+	elif args.subtitlesOnly:
+		downloader.harvestSubtitles(urls)
+	elif hasURLs:
+		downloader.downloadFromURLList(urls)
+	if downloader.contentStore is not None:
+		report = downloader.contentStore.report()
+		print ("Store: %d episode files linked to %d stored videos, %.2f GB stored for %.2f GB of episodes, %.2f GB saved, %d downloads (%.2f GB) avoided"
+			% (report["files"], report["objects"], report["storedBytes"] / 1024 ** 3, report["fileBytes"] / 1024 ** 3,
+			report["savedBytes"] / 1024 ** 3, report["avoidedDownloads"], report["avoidedBytes"] / 1024 ** 3))
+	downloader.close()
+	summary = downloader.metrics.finish()
+	if summary is not None:
+		print ("Episodes: %s, subtitles: %d, retries: %d, metrics written to %s" % (summary["episodes"], summary["subtitles"], summary["retries"], args.metrics))
 	exit(0)
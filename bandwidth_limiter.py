@@ -0,0 +1,242 @@
+import time
+import os
+
+TOKENS, REFILLED, RATE = range(3)
+ACTIVE, VTIME, WAITING, HOST, PID = range(5)
+FLOW_FIELDS = 5
+HOST_NAME_SIZE = 128
+
+def isAlive(pid:int):
+	'''
+		Returns:
+			False if the process pid is gone, or is a zombie killed but not yet waited for by its parent
+	'''
+	try:
+		os.kill(pid, 0)
+	except ProcessLookupError:
+		return (False)
+	except OSError:
+		return (True)
+	try:
+		with open("/proc/%d/stat" % pid, 'rb') as f:
+			return (f.read().rsplit(b")", 1)[-1].split()[0] != b"Z")
+	except (OSError, IndexError):
+		return (True)
+
+class Flow:
+	'''
+		A transfer registered with a BandwidthLimiter, closing it twice is harmless
+	'''
+	def __init__(self, slot, host:int):
+		self.slot = slot
+		self.host = host
+		self.closed = False
+
+	def __repr__(self):
+		return ('Flow(slot=%s, host=%s, closed=%s)' % (self.slot, self.host, self.closed))
+
+class BandwidthLimiter:
+	'''
+		Bandwidth cap shared by every transfer of a downloader, with a cap on the simultaneous transfers per CDN host.
+		Its state lives in shared memory like RateLimiter, so the threads and forked processes of a downloader share one budget.
+		The bytes are handed out fairly: among the transfers waiting for the budget, the one that received the fewest bytes
+		since it started goes first (start-time fair queuing), so no episode starves while a transfer that can't use its share
+		leaves it to the others.
+		The rate can be changed while downloading with setRate, or by writing a new rate in MB/s to ratePath.
+	'''
+	def __init__(self, rate:float=0, maxHostConnections:int=0, ratePath:str=None, flowSlots:int=64, hostSlots:int=32):
+		'''
+			Initialize the limiter
+				Parameters:
+					rate: the maximum number of bytes per second of all the transfers, 0 for no limit
+					maxHostConnections: the maximum number of simultaneous transfers from a host, 0 for no limit
+					ratePath: a file holding the rate in MB/s, read again when it changes
+					flowSlots: the maximum number of transfers scheduled fairly, the extra ones are only rate limited
+					hostSlots: the maximum number of hosts whose transfers are counted
+		'''
+		self.maxHostConnections = maxHostConnections
+		self.ratePath = ratePath
+		self.flowSlots = flowSlots
+		self.hostSlots = hostSlots
+		from multiprocessing import RawArray, Lock
+		self.lock = Lock()
+		self.state = RawArray('d', 3)
+		self.state[REFILLED] = time.time()
+		self.state[RATE] = rate
+		self.flows = RawArray('d', flowSlots * FLOW_FIELDS)
+		self.hostNames = RawArray('c', hostSlots * HOST_NAME_SIZE)
+		self.hostCounts = RawArray('i', hostSlots)
+		# when this process last looked at ratePath, and for the transfers of dead processes
+		self.rateChecked = (0, None)
+		self.reclaimed = 0
+		self.checkRatePath()
+
+	def __repr__(self):
+		return ('BandwidthLimiter(rate=%.0f, maxHostConnections=%d)' % (self.state[RATE], self.maxHostConnections))
+
+	@property
+	def rate(self):
+		'''
+			The current maximum number of bytes per second, 0 for no limit
+		'''
+		return (self.state[RATE])
+
+	def setRate(self, rate:float):
+		'''
+			Changes the maximum number of bytes per second of every worker, 0 removes the limit
+		'''
+		with self.lock:
+			self.state[RATE] = max(0, rate)
+
+	def checkRatePath(self):
+		'''
+			Reads ratePath again if it changed, at most once per second
+		'''
+		if self.ratePath is None or time.time() - self.rateChecked[0] < 1:
+			return
+		try:
+			modified = os.path.getmtime(self.ratePath)
+			if modified != self.rateChecked[1]:
+				with open(self.ratePath, 'r') as f:
+					self.setRate(float(f.read().strip() or 0) * 1024 ** 2)
+		except (OSError, ValueError):
+			modified = self.rateChecked[1]
+		self.rateChecked = (time.time(), modified)
+
+	def quantum(self, chunkSize:int):
+		'''
+			Returns:
+				the number of bytes to read at once, small enough for the budget to be shared about 20 times per second
+		'''
+		rate = self.state[RATE]
+		if rate <= 0:
+			return (chunkSize)
+		return (int(max(16 * 1024, min(chunkSize, rate / 20))))
+
+	def hostSlot(self, host:str):
+		'''
+			Returns:
+				the slot counting the transfers of host, to be called with self.lock held, None if every slot is taken
+		'''
+		encoded = host.encode('utf-8')[:HOST_NAME_SIZE - 1]
+		free = None
+		for slot in range(self.hostSlots):
+			name = self.hostNames[slot * HOST_NAME_SIZE:(slot + 1) * HOST_NAME_SIZE].split(b"\0")[0]
+			if name == encoded:
+				return (slot)
+			if free is None and (name == b"" or self.hostCounts[slot] == 0):
+				free = slot
+		if free is not None:
+			self.hostNames[free * HOST_NAME_SIZE:(free + 1) * HOST_NAME_SIZE] = encoded + b"\0" * (HOST_NAME_SIZE - len(encoded))
+			self.hostCounts[free] = 0
+		return (free)
+
+	def reclaim(self):
+		'''
+			Closes the transfers whose process died without closing them, like a killed worker, to be called with self.lock held.
+			Their slots are freed, and the ones left waiting for the budget no longer hold back the other transfers.
+		'''
+		alive = { os.getpid() : True }
+		for slot in range(self.flowSlots):
+			base = slot * FLOW_FIELDS
+			if not self.flows[base + ACTIVE]:
+				continue
+			pid = int(self.flows[base + PID])
+			if pid not in alive:
+				alive[pid] = isAlive(pid)
+			if not alive[pid]:
+				self.flows[base + ACTIVE] = 0
+				self.flows[base + WAITING] = 0
+				if self.flows[base + HOST] >= 0:
+					self.hostCounts[int(self.flows[base + HOST])] -= 1
+		self.reclaimed = time.time()
+
+	def open(self, host:str):
+		'''
+			Registers a transfer, waiting until its host has less than maxHostConnections transfers
+				Parameters:
+					host: the host the transfer downloads from
+				Returns:
+					the Flow to pass to consume and close
+		'''
+		while True:
+			with self.lock:
+				self.reclaim()
+				hostSlot = self.hostSlot(host) if self.maxHostConnections > 0 else None
+				if hostSlot is None or self.hostCounts[hostSlot] < self.maxHostConnections:
+					if hostSlot is not None:
+						self.hostCounts[hostSlot] += 1
+					active = [slot for slot in range(self.flowSlots) if self.flows[slot * FLOW_FIELDS + ACTIVE]]
+					for slot in range(self.flowSlots):
+						base = slot * FLOW_FIELDS
+						if not self.flows[base + ACTIVE]:
+							# a new transfer starts level with the others, not ahead of them
+							self.flows[base + VTIME] = min([self.flows[other * FLOW_FIELDS + VTIME] for other in active] or [0])
+							self.flows[base + WAITING] = 0
+							self.flows[base + HOST] = -1 if hostSlot is None else hostSlot
+							self.flows[base + PID] = os.getpid()
+							self.flows[base + ACTIVE] = 1
+							return (Flow(slot, hostSlot))
+					return (Flow(None, hostSlot))
+			time.sleep(0.05)
+
+	def isFirst(self, vtime:float):
+		'''
+			Returns:
+				True if no waiting transfer received fewer bytes than vtime, to be called with self.lock held
+		'''
+		return (all(vtime <= self.flows[slot * FLOW_FIELDS + VTIME] for slot in range(self.flowSlots)
+			if self.flows[slot * FLOW_FIELDS + ACTIVE] and self.flows[slot * FLOW_FIELDS + WAITING]))
+
+	def consume(self, flow:Flow, size:int):
+		'''
+			Waits until a transfer may read size more bytes
+				Parameters:
+					flow: the Flow of the transfer
+					size: the number of bytes about to be read
+		'''
+		self.checkRatePath()
+		if self.state[RATE] <= 0:
+			return
+		while True:
+			with self.lock:
+				now = time.time()
+				state = self.state
+				rate = state[RATE]
+				if rate <= 0:
+					return
+				# up to a tenth of a second of budget is kept while no transfer uses it
+				state[TOKENS] = min(max(size, rate / 10), state[TOKENS] + (now - state[REFILLED]) * rate)
+				state[REFILLED] = now
+				first = True
+				if flow is not None and flow.slot is not None:
+					base = flow.slot * FLOW_FIELDS
+					self.flows[base + WAITING] = 1
+					vtime = self.flows[base + VTIME]
+					first = self.isFirst(vtime)
+					if not first and now - self.reclaimed > 0.5:
+						# the transfer ahead may belong to a dead worker, it would never take its turn
+						self.reclaim()
+						first = self.isFirst(vtime)
+				if first and state[TOKENS] > 0:
+					state[TOKENS] -= size
+					if flow is not None and flow.slot is not None:
+						self.flows[base + VTIME] += size
+						self.flows[base + WAITING] = 0
+					return
+				delay = (size - state[TOKENS]) / rate if first else size / rate
+			time.sleep(min(max(delay, 0.001), 0.1))
+
+	def close(self, flow:Flow):
+		'''
+			Unregisters a finished or failed transfer
+		'''
+		if flow is None or flow.closed:
+			return
+		flow.closed = True
+		with self.lock:
+			if flow.slot is not None:
+				self.flows[flow.slot * FLOW_FIELDS + ACTIVE] = 0
+				self.flows[flow.slot * FLOW_FIELDS + WAITING] = 0
+			if flow.host is not None:
+				self.hostCounts[flow.host] -= 1
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+'''
+	Benchmarks AnimelonDownloader against the local fake Animelon of fake_server.py.
+	Reports the throughput, the latency of each episode, the CPU time and the peak RSS of the downloader.
+
+		$ python benchmarks/download.py --videoSize 300 --episodes 8 --concurrency 4 --segments 4
+		$ python benchmarks/download.py --subtitlesOnly --episodes 200 --concurrency 8
+'''
+from concurrent.futures import ThreadPoolExecutor
+from subprocess import Popen, PIPE
+from contextlib import nullcontext
+import statistics
+import argparse
+import tempfile
+import resource
+import shutil
+import json
+import time
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from animelon_dl import AnimelonDownloader
+
+def startFakeServer(args):
+	'''
+		Starts fake_server.py in its own process, so that its CPU time is not counted as the downloader's
+			Returns:
+				the server process and the url of its series
+	'''
+	command = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_server.py"), "--port", "0",
+		"--seasons", str(args.seasons), "--episodes", str(args.episodes), "--videoSize", str(args.videoSize),
+		"--subtitleSize", str(args.subtitleSize), "--latency", str(args.latency), "--throttleRate", str(args.throttleRate),
+		"--forbiddenRate", str(args.forbiddenRate)]
+	server = Popen(command, stdout=PIPE, text=True)
+	return (server, server.stdout.readline().strip())
+
+class Silenced:
+	'''
+		Sends the output of the downloader (progress bars included) to /dev/null
+	'''
+	def __enter__(self):
+		sys.stdout.flush()
+		sys.stderr.flush()
+		self.saved = [os.dup(1), os.dup(2)]
+		devnull = os.open(os.devnull, os.O_WRONLY)
+		os.dup2(devnull, 1)
+		os.dup2(devnull, 2)
+		os.close(devnull)
+
+	def __exit__(self, *exception):
+		sys.stdout.flush()
+		sys.stderr.flush()
+		for fd, saved in zip((1, 2), self.saved):
+			os.dup2(saved, fd)
+			os.close(saved)
+
+def filesSize(path:str, extensions:tuple):
+	'''
+		Returns:
+			the number and the total size of the files of path ending with one of extensions
+	'''
+	count, size = 0, 0
+	for directory, directories, files in os.walk(path):
+		for file in files:
+			if file.endswith(extensions):
+				count += 1
+				size += os.path.getsize(os.path.join(directory, file))
+	return (count, size)
+
+def runBenchmark(args):
+	'''
+		Downloads the fake series once
+			Returns:
+				a dict with the results
+	'''
+	server, seriesURL = startFakeServer(args)
+	savePath = tempfile.mkdtemp(prefix="animelon_benchmark_")
+	try:
+		downloader = AnimelonDownloader(baseURL=seriesURL.split("series/")[0], processMax=args.concurrency, savePath=savePath,
+			segments=args.segments, engine=args.engine, maxTries=args.maxTries, sleepTimeRetry=args.sleepTimeRetry,
+			apiRate=args.apiRate, cdnRate=args.cdnRate, subtitlesOnly=args.subtitlesOnly, subtitlesTypes=args.subtitlesType,
+			prefetch=args.prefetch or 0)
+		latencies = []
+		def downloadEpisode(episode):
+			videoId, fileName, seriesName = episode
+			os.makedirs(os.path.dirname(fileName), exist_ok=True)
+			start = time.perf_counter()
+			downloader.downloadFromVideoPage(id=videoId, fileName=fileName, seriesName=seriesName)
+			latencies.append(time.perf_counter() - start)
+		before = resource.getrusage(resource.RUSAGE_SELF), resource.getrusage(resource.RUSAGE_CHILDREN)
+		start = time.perf_counter()
+		with nullcontext() if args.verbose else Silenced():
+			if args.subtitlesOnly:
+				downloader.harvestSubtitles([seriesURL])
+			elif args.prefetch is not None:
+				# the pipeline of downloadSeries, the episode latencies are not measured
+				episodes = downloader.listEpisodes(seriesURL)
+				for videoId, fileName, seriesName in episodes:
+					os.makedirs(os.path.dirname(fileName), exist_ok=True)
+				downloader.downloadEpisodeList([(videoId, fileName, seriesName, "video") for videoId, fileName, seriesName in episodes])
+				downloader.waitForFreeProcess(1)
+			else:
+				with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+					list(executor.map(downloadEpisode, downloader.listEpisodes(seriesURL)))
+		elapsed = time.perf_counter() - start
+		# the server is not reaped yet, so RUSAGE_CHILDREN only holds the downloader's own processes
+		after = resource.getrusage(resource.RUSAGE_SELF), resource.getrusage(resource.RUSAGE_CHILDREN)
+		cpu = sum(a.ru_utime + a.ru_stime - (b.ru_utime + b.ru_stime) for a, b in zip(after, before))
+		files, size = filesSize(savePath, (".ass",) if args.subtitlesOnly else (".mp4",))
+		results = { "episodes": args.seasons * args.episodes, "files": files, "bytes": size, "seconds": elapsed,
+			"throughput": size / elapsed / 1024 ** 2, "cpuSeconds": cpu, "peakRSS": max(after[0].ru_maxrss, after[1].ru_maxrss) / 1024 }
+		if len(latencies):
+			latencies.sort()
+			results["latency"] = { "mean": statistics.mean(latencies), "p50": latencies[len(latencies) // 2],
+				"p95": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], "max": latencies[-1] }
+	finally:
+		server.terminate()
+		server.wait()
+		if args.keep:
+			print ("Files kept in", savePath, file=sys.stderr)
+		else:
+			shutil.rmtree(savePath, ignore_errors=True)
+	# the server prints its statistics when it is terminated
+	results["server"] = json.loads(server.stdout.readline() or "{}")
+	return (results)
+
+def printResults(results:dict, run:int):
+	print ("run %d: %d/%d files, %.1f MB in %.2fs, %.2f MB/s, %.2fs CPU, %.1f MB peak RSS" % (run, results["files"],
+		results["episodes"], results["bytes"] / 1024 ** 2, results["seconds"], results["throughput"], results["cpuSeconds"], results["peakRSS"]))
+	if "latency" in results:
+		print ("       episode latency: mean %(mean).2fs, p50 %(p50).2fs, p95 %(p95).2fs, max %(max).2fs" % results["latency"])
+	print ("       server: %d requests, responses by status %s" % (results["server"].get("requests", 0), results["server"].get("statuses")))
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description='Benchmarks the downloader against a local fake Animelon')
+	parser.add_argument('--concurrency', metavar='concurrency', help='Number of episodes downloaded at once (defaults to 4)', type=int, default=4)
+	parser.add_argument('--segments', metavar='segments', help='Number of byte ranges per video (defaults to 1)', type=int, default=1)
+	parser.add_argument('--engine', metavar='engine', help='Engine of the downloader (defaults to thread)', type=str, default="thread", choices=["process", "thread"])
+	parser.add_argument('--seasons', metavar='seasons', help='Number of seasons (defaults to 1)', type=int, default=1)
+	parser.add_argument('--episodes', metavar='episodes', help='Number of episodes per season (defaults to 8)', type=int, default=8)
+	parser.add_argument('--videoSize', metavar='videoSize', help='Size of each video in MB (defaults to 64)', type=float, default=64)
+	parser.add_argument('--subtitleSize', metavar='subtitleSize', help='Size of each subtitle in KB (defaults to 256)', type=float, default=256)
+	parser.add_argument('--subtitlesType', metavar='subtitlesType', help='Types of subtitle to download (defaults to englishSub)', type=str, nargs='+', default=["englishSub"])
+	parser.add_argument('--prefetch', metavar='prefetch', help='Download through the pipeline of downloadSeries with this many episodes prefetched, instead of one thread per episode (defaults to none)', type=int, default=None)
+	parser.add_argument('--subtitlesOnly', help='Benchmark the subtitle harvest instead of the videos', action='store_true')
+	parser.add_argument('--latency', metavar='latency', help='Delay added by the server to every response in ms (defaults to 0)', type=float, default=0)
+	parser.add_argument('--throttleRate', metavar='throttleRate', help='The server answers 429 beyond this many requests per second (defaults to 0, no throttling)', type=float, default=0)
+	parser.add_argument('--forbiddenRate', metavar='forbiddenRate', help='Probability that the server answers 403 to a CDN request (defaults to 0)', type=float, default=0)
+	parser.add_argument('--apiRate', metavar='apiRate', help='Maximum number of API requests per second (defaults to 5)', type=float, default=5)
+	parser.add_argument('--cdnRate', metavar='cdnRate', help='Maximum number of CDN requests per second (defaults to 20)', type=float, default=20)
+	parser.add_argument('--maxTries', metavar='maxTries', help='Maximum number of tries (defaults to 5)', type=int, default=5)
+	parser.add_argument('--sleepTimeRetry', metavar='sleepTimeRetry', help='Base backoff between tries in seconds (defaults to 1)', type=float, default=1)
+	parser.add_argument('--runs', metavar='runs', help='Number of runs (defaults to 1)', type=int, default=1)
+	parser.add_argument('--json', help='Print the results as JSON', action='store_true')
+	parser.add_argument('--keep', help='Keep the downloaded files', action='store_true')
+	parser.add_argument('--verbose', help='Show the output of the downloader', action='store_true')
+	args = parser.parse_args()
+	allResults = []
+	for run in range(1, args.runs + 1):
+		results = runBenchmark(args)
+		allResults.append(results)
+		if not args.json:
+			printResults(results, run)
+	if args.json:
+		print (json.dumps(allResults, indent=4))
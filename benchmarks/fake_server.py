@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+'''
+	Local stand-in for the Animelon API and CDN, used by the benchmarks.
+	It serves a synthetic series, findByVideo responses with subtitles encrypted by SubtitleDecryptor.encrypt,
+	and video bodies of any size generated on the fly, with optional latency, throttling and 403s.
+
+		$ python benchmarks/fake_server.py --port 8710 --videoSize 300 --episodes 12
+'''
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from threading import Thread, Lock
+import argparse
+import signal
+import random
+import json
+import time
+import sys
+import os
+import re
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from subtitle_decryptor import SubtitleDecryptor
+
+# the user agent key the CDN expects, formatted like in the real API
+USER_AGENT_KEY = "Mozilla/5=+(dot)+=0 (iPhone; CPU iPhone OS 14_6 like Mac OS X) AppleWebKit/605=+(dot)+=1=+(dot)+=15 (KHTML, like Gecko) Mobile/15E148"
+USER_AGENT = USER_AGENT_KEY.replace("=+(dot)+=", ".")
+PATTERN_SIZE = 1024 ** 2
+WRITE_SIZE = 64 * 1024
+
+class FakeAnimelonHandler(BaseHTTPRequestHandler):
+	protocol_version = "HTTP/1.1"
+
+	def log_message(self, format, *args):
+		pass
+
+	def send(self, status:int, body=b"", contentType:str="application/json", headers:dict={}):
+		'''
+			Sends a complete response
+		'''
+		self.send_response(status)
+		self.send_header("Content-Type", contentType)
+		self.send_header("Content-Length", str(len(body)))
+		for name, value in headers.items():
+			self.send_header(name, value)
+		self.end_headers()
+		if self.command != "HEAD":
+			self.wfile.write(body)
+		self.server.fake.count(status, len(body))
+
+	def do_HEAD(self):
+		self.do_GET()
+
+	def do_GET(self):
+		fake = self.server.fake
+		if fake.latency > 0:
+			time.sleep(fake.latency)
+		if fake.isThrottled():
+			return (self.send(429, headers={ "Retry-After": "1" }))
+		match = re.match(r"/api/series/([^/?]+)", self.path)
+		if match:
+			return (self.send(200, fake.seriesResponse))
+		match = re.match(r"/api/languagevideo/findByVideo\?videoId=([^&]+)", self.path)
+		if match:
+			return (self.send(200, fake.videoResponse(match.group(1))))
+		match = re.match(r"/cdn/(\w+)/([^/?]+)", self.path)
+		if match:
+			return (self.sendVideo())
+		self.send(404)
+
+	def sendVideo(self):
+		'''
+			Serves a synthetic video, honoring Range requests
+		'''
+		fake = self.server.fake
+		if self.headers.get("User-Agent") != USER_AGENT or fake.isForbidden():
+			return (self.send(403, b"Forbidden", "text/plain"))
+		size = fake.videoSize
+		start, end, status = 0, size - 1, 200
+		headers = { "Accept-Ranges": "bytes" }
+		match = re.match(r"bytes=(\d+)-(\d*)", self.headers.get("Range") or "")
+		if match:
+			start = int(match.group(1))
+			if start >= size:
+				return (self.send(416, headers={ "Content-Range": "bytes */%d" % size }))
+			if match.group(2):
+				end = min(int(match.group(2)), size - 1)
+			status = 206
+			headers["Content-Range"] = "bytes %d-%d/%d" % (start, end, size)
+		self.send_response(status)
+		self.send_header("Content-Type", "video/mp4")
+		self.send_header("Content-Length", str(end - start + 1))
+		for name, value in headers.items():
+			self.send_header(name, value)
+		self.end_headers()
+		sent = 0
+		if self.command != "HEAD":
+			sent = fake.writeVideo(self.wfile, start, end + 1)
+		fake.count(status, sent)
+
+class FakeAnimelon:
+	'''
+		A fake Animelon serving one series from a background thread
+	'''
+	def __init__(self, host:str="127.0.0.1", port:int=0, seriesName:str="Benchmark Series", seasons:int=1, episodes:int=4,
+				videoSize:int=64 * 1024 ** 2, subtitleSize:int=256 * 1024, latency:float=0, throttleRate:float=0,
+				forbiddenRate:float=0, seed:int=0):
+		'''
+			Initialize the server
+				Parameters:
+					host: the address to listen on
+					port: the port to listen on, 0 picks a free one
+					seriesName: the name of the series
+					seasons: the number of seasons of the series
+					episodes: the number of episodes of each season
+					videoSize: the size of each video in bytes
+					subtitleSize: the size of each decrypted subtitle in bytes
+					latency: the delay in seconds added before every response
+					throttleRate: answer 429 beyond this many requests per second, 0 disables throttling
+					forbiddenRate: the probability that a CDN request is answered 403
+					seed: the seed of the generated content and of the injected 403s
+		'''
+		self.seriesName = seriesName
+		self.videoSize = videoSize
+		self.latency = latency
+		self.throttleRate = throttleRate
+		self.forbiddenRate = forbiddenRate
+		self.random = random.Random(seed)
+		self.pattern = memoryview(random.Random(seed).randbytes(PATTERN_SIZE) * 2)
+		self.lock = Lock()
+		self.window = (0, 0)
+		self.statuses = {}
+		self.bytesSent = 0
+		self.requests = 0
+		self.videoIds = [["s%.2de%.3d" % (season, episode) for episode in range(1, episodes + 1)] for season in range(1, seasons + 1)]
+		self.seriesResponse = json.dumps({ "resObj": { "_id": seriesName,
+			"seasons": [{ "number": str(season), "episodes": videoIds } for season, videoIds in enumerate(self.videoIds, 1)] } }).encode()
+		line = "Dialogue: 0,0:21:50.83,0:21:53.87,Default,,0,0,0,,War really is the worst.\n"
+		self.subtitle = ("[Script Info]\nScriptType: v4.00+\n\n[Events]\n" + line * max(1, subtitleSize // len(line))).encode()
+		passphrase = b"fakeanim"
+		self.encryptedSubtitle = passphrase[::-1].decode() + SubtitleDecryptor().encrypt(self.subtitle, passphrase).decode() + "d(^-^"
+		self.httpServer = ThreadingHTTPServer((host, port), FakeAnimelonHandler)
+		self.httpServer.daemon_threads = True
+		self.httpServer.fake = self
+		self.httpServer.handle_error = lambda request, address: None
+		self.thread = None
+
+	def __repr__(self):
+		return ('FakeAnimelon(baseURL="%s", videoSize=%d)' % (self.baseURL, self.videoSize))
+
+	@property
+	def baseURL(self):
+		'''
+			The url to give to AnimelonDownloader as baseURL
+		'''
+		host, port = self.httpServer.server_address[0:2]
+		return ("http://%s:%d/" % (host, port))
+
+	@property
+	def seriesURL(self):
+		return (self.baseURL + "series/" + self.seriesName.replace(" ", "%20"))
+
+	def start(self):
+		'''
+			Starts serving from a background thread
+				Returns:
+					the base url of the server
+		'''
+		self.thread = Thread(target=self.httpServer.serve_forever, daemon=True)
+		self.thread.start()
+		return (self.baseURL)
+
+	def stop(self):
+		'''
+			Stops the server
+		'''
+		self.httpServer.shutdown()
+		self.httpServer.server_close()
+
+	def videoResponse(self, videoId:str):
+		'''
+			Returns:
+				the findByVideo response of a video
+		'''
+		videoURLs = { quality: self.baseURL + "cdn/" + quality + "/" + videoId for quality in ("ozez", "stz", "tsz") }
+		subtitles = { languageSub: self.encryptedSubtitle for languageSub in ("englishSub", "romajiSub", "hiraganaSub", "japaneseSub") }
+		return (json.dumps({ "resObj": { "title": self.seriesName + " " + videoId, "subtitles": [{ "content": subtitles }],
+			"video": { "videoURLsData": { USER_AGENT_KEY: { "videoURLs": videoURLs } } } } }).encode())
+
+	def writeVideo(self, stream, start:int, end:int):
+		'''
+			Writes the bytes [start, end[ of the synthetic video, which repeats a random pattern
+				Returns:
+					the number of bytes written
+		'''
+		position = start
+		try:
+			while position < end:
+				offset = position % PATTERN_SIZE
+				length = min(WRITE_SIZE, end - position)
+				stream.write(self.pattern[offset:offset + length])
+				position += length
+		except (BrokenPipeError, ConnectionResetError):
+			pass
+		return (position - start)
+
+	def isThrottled(self):
+		'''
+			Returns:
+				True if the request exceeds throttleRate requests in the current second
+		'''
+		if self.throttleRate <= 0:
+			return (False)
+		with self.lock:
+			second, requests = self.window
+			now = int(time.time())
+			if now != second:
+				second, requests = now, 0
+			self.window = (second, requests + 1)
+			return (requests >= self.throttleRate)
+
+	def isForbidden(self):
+		with self.lock:
+			return (self.random.random() < self.forbiddenRate)
+
+	def count(self, status:int, sent:int):
+		'''
+			Records a response in the statistics
+		'''
+		with self.lock:
+			self.requests += 1
+			self.bytesSent += sent
+			self.statuses[status] = self.statuses.get(status, 0) + 1
+
+	def statistics(self):
+		'''
+			Returns:
+				a dict with the number of requests, the bytes sent and the number of responses by status
+		'''
+		with self.lock:
+			return ({ "requests": self.requests, "bytesSent": self.bytesSent, "statuses": dict(self.statuses) })
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description='Serves a fake Animelon API and CDN')
+	parser.add_argument('--host', metavar='host', help='Address to listen on (defaults to 127.0.0.1)', type=str, default="127.0.0.1")
+	parser.add_argument('--port', metavar='port', help='Port to listen on (defaults to 8710)', type=int, default=8710)
+	parser.add_argument('--seasons', metavar='seasons', help='Number of seasons (defaults to 1)', type=int, default=1)
+	parser.add_argument('--episodes', metavar='episodes', help='Number of episodes per season (defaults to 4)', type=int, default=4)
+	parser.add_argument('--videoSize', metavar='videoSize', help='Size of each video in MB (defaults to 64)', type=float, default=64)
+	parser.add_argument('--subtitleSize', metavar='subtitleSize', help='Size of each subtitle in KB (defaults to 256)', type=float, default=256)
+	parser.add_argument('--latency', metavar='latency', help='Delay added to every response in ms (defaults to 0)', type=float, default=0)
+	parser.add_argument('--throttleRate', metavar='throttleRate', help='Answer 429 beyond this many requests per second (defaults to 0, no throttling)', type=float, default=0)
+	parser.add_argument('--forbiddenRate', metavar='forbiddenRate', help='Probability of answering 403 to a CDN request (defaults to 0)', type=float, default=0)
+	args = parser.parse_args()
+	fake = FakeAnimelon(args.host, args.port, seasons=args.seasons, episodes=args.episodes, videoSize=int(args.videoSize * 1024 ** 2),
+		subtitleSize=int(args.subtitleSize * 1024), latency=args.latency / 1000, throttleRate=args.throttleRate, forbiddenRate=args.forbiddenRate)
+	print (fake.seriesURL, flush=True)
+	signal.signal(signal.SIGTERM, signal.default_int_handler)
+	try:
+		fake.httpServer.serve_forever()
+	except KeyboardInterrupt:
+		pass
+	# read by download.py
+	print (json.dumps(fake.statistics()), flush=True)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+'''
+	Benchmarks the cold start of animelon_dl: the wall time and the peak RSS of a fresh interpreter running -h,
+	importing the module, creating a downloader and creating its subtitle decryptor,
+	then the slowest imports reported by python -X importtime.
+
+		$ python benchmarks/startup.py --runs 20 --top 15
+'''
+import statistics
+import subprocess
+import argparse
+import tempfile
+import time
+import sys
+import os
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+def scenarios(savePath:str):
+	'''
+		Returns:
+			a list of (name, interpreter arguments) of the measured commands
+	'''
+	create = "from animelon_dl import AnimelonDownloader; downloader = AnimelonDownloader(savePath=%r, useCache=False, showProgress=False)" % (savePath)
+	return ([
+		("python -c pass", ["-c", "pass"]),
+		("animelon_dl.py -h", [os.path.join(ROOT, "animelon_dl.py"), "-h"]),
+		("-m animelon_dl -h", ["-m", "animelon_dl", "-h"]),
+		("import animelon_dl", ["-c", "import animelon_dl"]),
+		("AnimelonDownloader()", ["-c", create]),
+		("+ subtitle decryptor", ["-c", create + "; downloader.decryptor"]),
+	])
+
+def measure(arguments:list):
+	'''
+		Returns:
+			the wall time in seconds and the peak RSS in MB of one run of the interpreter
+	'''
+	start = time.perf_counter()
+	process = subprocess.Popen([sys.executable] + arguments, cwd=ROOT, stdout=subprocess.DEVNULL)
+	pid, status, usage = os.wait4(process.pid, 0)
+	elapsed = time.perf_counter() - start
+	process.returncode = os.waitstatus_to_exitcode(status)
+	if process.returncode != 0:
+		raise RuntimeError("%s exited with %d" % (" ".join(arguments), process.returncode))
+	# ru_maxrss is in KB on Linux
+	return (elapsed, usage.ru_maxrss / 1024)
+
+def importTimes(module:str):
+	'''
+		Imports module under python -X importtime
+			Returns:
+				a list of (cumulative microseconds, self microseconds, name) of module and of the modules it imported, the slowest first,
+				the modules already loaded by the interpreter and site are left out
+	'''
+	output = subprocess.run([sys.executable, "-X", "importtime", "-c", "import " + module], cwd=ROOT, capture_output=True, text=True, check=True).stderr
+	imports = []
+	for line in output.splitlines():
+		if not line.startswith("import time:") or "self [us]" in line:
+			continue
+		own, cumulative, name = line[len("import time:"):].split("|")
+		if not name.startswith("  "):
+			# a module imported at the top level, the children of the next one are listed after it
+			if name.strip() == module:
+				imports.append((int(cumulative), int(own), name.rstrip()))
+				break
+			imports = []
+			continue
+		imports.append((int(cumulative), int(own), name.rstrip()))
+	return (sorted(imports, reverse=True))
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description='Benchmarks the cold start of animelon_dl')
+	parser.add_argument('--runs', metavar='runs', help='Number of runs of each command, the median is reported (defaults to 10)', type=int, default=10)
+	parser.add_argument('--top', metavar='top', help='Number of imports listed from python -X importtime (defaults to 15)', type=int, default=15)
+	args = parser.parse_args()
+	savePath = tempfile.mkdtemp(prefix="animelon_startup_")
+	# compiles the modules first, so that every run loads them from __pycache__
+	subprocess.run([sys.executable, "-m", "compileall", "-q", ROOT], check=True)
+	print ("%-24s %10s %10s %10s" % ("", "median ms", "best ms", "RSS MB"))
+	for name, arguments in scenarios(savePath):
+		results = [measure(arguments) for run in range(args.runs)]
+		elapsed = [result[0] * 1000 for result in results]
+		print ("%-24s %10.1f %10.1f %10.1f" % (name, statistics.median(elapsed), min(elapsed), max(result[1] for result in results)))
+	os.rmdir(savePath)
+	print ("\nSlowest imports of animelon_dl (python -X importtime):")
+	print ("%13s %10s  %s" % ("cumulative ms", "self ms", "module"))
+	for cumulative, own, module in importTimes("animelon_dl")[:args.top]:
+		print ("%13.1f %10.1f  %s" % (cumulative / 1000, own / 1000, module))
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+'''
+	Micro-benchmark of SubtitleDecryptor on large ASS files: time and peak allocations per subtitle
+	of the previous copy-heavy decryption path against the current one.
+
+		$ python benchmarks/subtitle_decryption.py --size 4 --count 20
+'''
+from hashlib import md5
+import tracemalloc
+import argparse
+import base64
+import time
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from subtitle_decryptor import SubtitleDecryptor, cached_key_iv
+from Crypto.Cipher import AES
+
+def legacyDecryptSubtitle(encryptedSubtitle:str):
+	'''
+		The decryption path before the memoryview rework: every step copies the data and derives the key again
+	'''
+	encryptedSubtitle = bytes(encryptedSubtitle, 'utf-8')
+	key = encryptedSubtitle[0:8][::-1]
+	encrypted = base64.b64decode(encryptedSubtitle[8:-5])
+	length = 16 - (len(encrypted) % 16)
+	encrypted = encrypted + (chr(length)*length).encode()
+	salt = encrypted[8:16]
+	data = key + salt
+	keyIV = md5(data).digest()
+	finalKey = keyIV
+	while len(finalKey) < 48:
+		keyIV = md5(keyIV + data).digest()
+		finalKey += keyIV
+	aes = AES.new(finalKey[:32], AES.MODE_CBC, finalKey[32:48])
+	decrypted = aes.decrypt(encrypted[16:])
+	return (decrypted[:-decrypted[-1]])
+
+def makeSubtitle(size:int):
+	'''
+		Returns:
+			an encrypted ASS subtitle of about size bytes, in the format served by the API
+	'''
+	line = "Dialogue: 0,0:21:50.83,0:21:53.87,Default,,0,0,0,,War really is the worst.\n"
+	content = ("[Script Info]\nScriptType: v4.00+\n\n[Events]\n" + line * (size // len(line))).encode()
+	passphrase = b"abcdefgh"
+	return ((passphrase[::-1].decode() + SubtitleDecryptor().encrypt(content, passphrase).decode() + "d(^-^"))
+
+def measure(decrypt, subtitles:list):
+	'''
+		Returns:
+			the mean time in seconds and the peak of allocated bytes per subtitle
+	'''
+	decrypt(subtitles[0])
+	start = time.perf_counter()
+	for subtitle in subtitles:
+		decrypt(subtitle)
+	elapsed = (time.perf_counter() - start) / len(subtitles)
+	tracemalloc.start()
+	decrypt(subtitles[0])
+	peak = tracemalloc.get_traced_memory()[1]
+	tracemalloc.stop()
+	return (elapsed, peak)
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description='Benchmarks the subtitle decryption')
+	parser.add_argument('--size', metavar='size', help='Size of each subtitle in MB', type=float, default=2)
+	parser.add_argument('--count', metavar='count', help='Number of subtitles decrypted per run', type=int, default=20)
+	args = parser.parse_args()
+	subtitles = [makeSubtitle(int(args.size * 1024**2))] * args.count
+	decryptor = SubtitleDecryptor()
+	results = [("legacy", measure(legacyDecryptSubtitle, subtitles)),
+		("decrypt_subtitle", measure(decryptor.decrypt_subtitle, subtitles)),
+		("decrypt_many", measure(lambda subtitle: decryptor.decrypt_many([subtitle]), subtitles))]
+	print ("%d subtitles of %.1f MB (%d encrypted characters)" % (args.count, args.size, len(subtitles[0])))
+	for name, (elapsed, peak) in results:
+		print ("%-18s %8.2f ms/subtitle %8.2f MB peak allocations" % (name, elapsed * 1000, peak / 1024**2))
+	print (cached_key_iv.cache_info())
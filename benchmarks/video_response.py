@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+'''
+	Benchmarks the parsing of a findByVideo response: time and peak allocations of json.loads on the whole response
+	against AnimelonDownloader.parseVideoResponse keeping every subtitle, one subtitle or none.
+
+		$ python benchmarks/video_response.py --subtitleSize 2 --tracks 3
+'''
+import tracemalloc
+import argparse
+import tempfile
+import base64
+import shutil
+import json
+import time
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from animelon_dl import AnimelonDownloader
+from fake_server import USER_AGENT_KEY
+
+LANGUAGES = ("englishSub", "romajiSub", "hiraganaSub", "japaneseSub")
+
+def makeResponse(subtitleSize:float, tracks:int):
+	'''
+		Returns:
+			a findByVideo response with tracks subtitle entries, each with a subtitle of subtitleSize MB in every language
+	'''
+	subtitle = "hgfedcba" + base64.b64encode(os.urandom(int(subtitleSize * 1024 ** 2 * 3 / 4))).decode() + "d(^-^"
+	videoURLs = { quality: "https://cdn.example/" + quality + "/video" for quality in ("ozez", "stz", "tsz") }
+	return (json.dumps({ "resObj": { "title": "Series S1E1", "_id": "5b5412ce33107581e4f672a5", "views": 12345,
+		"subtitles": [{ "content": { languageSub: subtitle for languageSub in LANGUAGES }, "language": "ja" } for track in range(tracks)],
+		"video": { "videoURLsData": { USER_AGENT_KEY: { "videoURLs": videoURLs } }, "duration": 1440 } } }).encode())
+
+def measure(parse, content:bytes, runs:int):
+	'''
+		Returns:
+			the best time in seconds and the peak of allocated bytes of parse(content)
+	'''
+	elapsed = []
+	for run in range(runs):
+		start = time.perf_counter()
+		parse(content)
+		elapsed.append(time.perf_counter() - start)
+	tracemalloc.start()
+	parse(content)
+	peak = tracemalloc.get_traced_memory()[1]
+	tracemalloc.stop()
+	return (min(elapsed), peak)
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description='Benchmarks the parsing of findByVideo responses')
+	parser.add_argument('--subtitleSize', metavar='subtitleSize', help='Size of each subtitle in MB (defaults to 1)', type=float, default=1)
+	parser.add_argument('--tracks', metavar='tracks', help='Number of subtitle entries, each with the 4 languages (defaults to 2)', type=int, default=2)
+	parser.add_argument('--runs', metavar='runs', help='Number of parses per variant, the best is kept (defaults to 10)', type=int, default=10)
+	args = parser.parse_args()
+	savePath = tempfile.mkdtemp(prefix="animelon_response_")
+	downloader = AnimelonDownloader(savePath=savePath, useCache=False, showProgress=False)
+	content = makeResponse(args.subtitleSize, args.tracks)
+	variants = [
+		("json.loads", lambda content: json.loads(content)["resObj"]),
+		("select 4 subtitles", lambda content: downloader.parseVideoResponse(content, list(LANGUAGES))),
+		("select englishSub", lambda content: downloader.parseVideoResponse(content, ["englishSub"])),
+		("select no subtitle", lambda content: downloader.parseVideoResponse(content, [])),
+		("subtitles only", lambda content: downloader.parseVideoResponse(content, ["englishSub"], video=False)),
+	]
+	print ("Response of %.1f MB" % (len(content) / 1024 ** 2))
+	print ("%-22s %10s %14s" % ("", "ms", "peak MB"))
+	for name, parse in variants:
+		elapsed, peak = measure(parse, content, args.runs)
+		print ("%-22s %10.2f %14.2f" % (name, elapsed * 1000, peak / 1024 ** 2))
+	downloader.close()
+	shutil.rmtree(savePath)
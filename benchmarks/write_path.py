@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+'''
+	Benchmarks the write path of a single video stream: CPU time per GB of the previous 2 KB iter_content loop
+	against AnimelonDownloader.copyStream with several buffer sizes, served by fake_server.py.
+
+		$ python benchmarks/write_path.py --videoSize 1024 --chunkSizes 0.0625 1 4 16
+'''
+from subprocess import Popen, PIPE
+import argparse
+import tempfile
+import time
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from animelon_dl import AnimelonDownloader
+from fake_server import USER_AGENT
+
+def legacyCopy(downloader, response, f):
+	'''
+		The write path before copyStream: 2 KB chunks from iter_content, a new bytes object each
+	'''
+	for chunk in response.iter_content(chunk_size=2 * 1024):
+		f.write(chunk)
+
+def copyStream(downloader, response, f):
+	for size in downloader.copyStream(response, f):
+		pass
+
+def measure(downloader, url:str, copy, path:str):
+	'''
+		Returns:
+			the wall time, the CPU time and the number of bytes of one download of url
+	'''
+	start, cpu = time.perf_counter(), time.process_time()
+	response = downloader.request("GET", url, USER_AGENT, stream=True)
+	with open(path, 'wb') as f:
+		copy(downloader, response, f)
+	response.close()
+	return (time.perf_counter() - start, time.process_time() - cpu, os.path.getsize(path))
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description='Benchmarks the video write path')
+	parser.add_argument('--videoSize', metavar='videoSize', help='Size of the video in MB (defaults to 512)', type=float, default=512)
+	parser.add_argument('--chunkSizes', metavar='chunkSizes', help='Buffer sizes of copyStream to compare, in MB (defaults to 0.0625 1 4 16)', type=float, nargs='+', default=[0.0625, 1, 4, 16])
+	parser.add_argument('--runs', metavar='runs', help='Number of downloads per variant, the best is kept (defaults to 3)', type=int, default=3)
+	args = parser.parse_args()
+	server = Popen([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_server.py"), "--port", "0",
+		"--videoSize", str(args.videoSize), "--episodes", "1"], stdout=PIPE, text=True)
+	try:
+		baseURL = server.stdout.readline().strip().split("series/")[0]
+		url = baseURL + "cdn/ozez/s01e001"
+		variants = [("iter_content 2 KB", 2 * 1024, legacyCopy)] + [("copyStream %g MB" % size, int(size * 1024 ** 2), copyStream) for size in args.chunkSizes]
+		path = os.path.join(tempfile.mkdtemp(prefix="animelon_write_"), "video.mp4")
+		print ("%-22s %10s %12s" % ("", "MB/s", "CPU s/GB"))
+		for name, chunkSize, copy in variants:
+			downloader = AnimelonDownloader(baseURL=baseURL, savePath=os.path.dirname(path), chunkSize=chunkSize, cdnRate=1000,
+				useCache=False, showProgress=False)
+			results = [measure(downloader, url, copy, path) for run in range(args.runs)]
+			elapsed, cpu, size = min(results, key=lambda result: result[1])
+			print ("%-22s %10.1f %12.3f" % (name, size / elapsed / 1024 ** 2, cpu / (size / 1024 ** 3)))
+		os.remove(path)
+		os.rmdir(os.path.dirname(path))
+	finally:
+		server.terminate()
+		server.wait()
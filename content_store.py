@@ -0,0 +1,219 @@
+from threading import Lock
+import hashlib
+import sqlite3
+import time
+import os
+try:
+	import fcntl
+except ImportError:
+	# no reflinks on Windows, only hardlinks
+	fcntl = None
+
+# ioctl of Linux cloning a file into another one, on btrfs, XFS and other copy-on-write file systems
+FICLONE = 0x40049409
+
+class ContentStore:
+	'''
+		Content-addressed store of videos: each distinct video is kept once, as objects/<sha256 prefix>/<sha256>.mp4,
+		and the episode files of every series and savePath are reflinks or hardlinks to it.
+		An index maps each video id to its object, so a video already in the store is linked instead of downloaded again,
+		and a downloaded video identical to an object (the same video under another id) is replaced by a link to it.
+		The store must be on the same file system as the libraries it links into.
+		Safe to share between the threads and the forked processes of a downloader.
+	'''
+	def __init__(self, path:str, linkMode:str="auto"):
+		'''
+			Initialize the store
+				Parameters:
+					path: the directory of the store
+					linkMode: how episode files are linked to objects, "reflink", "hardlink",
+						or "auto" which tries a reflink then a hardlink
+		'''
+		assert linkMode in ("auto", "reflink", "hardlink"), linkMode
+		self.path = path
+		self.linkMode = linkMode
+		os.makedirs(os.path.join(path, "objects"), exist_ok=True)
+		self.lock = Lock()
+		self.connection = None
+		self.pid = None
+
+	def __repr__(self):
+		return ('ContentStore(path="%s", linkMode="%s")' % (self.path, self.linkMode))
+
+	def __getstate__(self):
+		state = self.__dict__.copy()
+		state["connection"] = None
+		state["pid"] = None
+		del state["lock"]
+		return (state)
+
+	def __setstate__(self, state):
+		self.__dict__.update(state)
+		self.lock = Lock()
+
+	def checkFork(self):
+		'''
+			Forgets the connection inherited from the parent process, a connection is never shared with a forked child
+		'''
+		if self.pid != os.getpid():
+			self.pid = os.getpid()
+			self.lock = Lock()
+			self.connection = None
+
+	def connect(self):
+		'''
+			Returns:
+				the SQLite connection of the current process, to be used with self.lock held
+		'''
+		if self.connection is None:
+			self.connection = sqlite3.connect(os.path.join(self.path, "index.sqlite"), timeout=60, check_same_thread=False, isolation_level=None)
+			self.connection.execute("PRAGMA journal_mode=WAL")
+			self.connection.execute("CREATE TABLE IF NOT EXISTS objects (hash TEXT PRIMARY KEY, size INTEGER NOT NULL, created REAL NOT NULL)")
+			self.connection.execute("CREATE TABLE IF NOT EXISTS videos (videoId TEXT PRIMARY KEY, hash TEXT NOT NULL)")
+			# transferred is 0 for the files linked instead of being downloaded
+			self.connection.execute("CREATE TABLE IF NOT EXISTS links (path TEXT PRIMARY KEY, hash TEXT NOT NULL, method TEXT NOT NULL, "
+				+ "transferred INTEGER NOT NULL, updated REAL NOT NULL)")
+		return (self.connection)
+
+	def execute(self, query:str, parameters:tuple=()):
+		'''
+			Returns:
+				the rows of a query
+		'''
+		self.checkFork()
+		with self.lock:
+			return (self.connect().execute(query, parameters).fetchall())
+
+	def objectPath(self, digest:str):
+		return (os.path.join(self.path, "objects", digest[0:2], digest + ".mp4"))
+
+	def hashFile(self, fileName:str, bufferSize:int=4 * 1024 ** 2):
+		'''
+			Returns:
+				the sha256 hex digest of a file
+		'''
+		hasher = hashlib.sha256()
+		view = memoryview(bytearray(bufferSize))
+		with open(fileName, 'rb') as f:
+			while True:
+				size = f.readinto(view)
+				if not size:
+					break
+				hasher.update(view[:size])
+		return (hasher.hexdigest())
+
+	def link(self, source:str, destination:str):
+		'''
+			Replaces destination by a reflink or a hardlink of source, atomically
+				Returns:
+					the method used, "reflink" or "hardlink"
+				Raises:
+					OSError if neither is possible, like across file systems
+		'''
+		temporary = destination + ".link"
+		if os.path.exists(temporary):
+			os.remove(temporary)
+		if self.linkMode in ("auto", "reflink") and fcntl is not None:
+			try:
+				with open(source, 'rb') as src, open(temporary, 'wb') as dst:
+					fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+				os.replace(temporary, destination)
+				return ("reflink")
+			except OSError:
+				if os.path.exists(temporary):
+					os.remove(temporary)
+				if self.linkMode == "reflink":
+					raise
+		os.link(source, temporary)
+		os.replace(temporary, destination)
+		return ("hardlink")
+
+	def record(self, path:str, digest:str, method:str, transferred:int):
+		self.execute("INSERT OR REPLACE INTO links (path, hash, method, transferred, updated) VALUES (?, ?, ?, ?, ?)",
+			(os.path.abspath(path), digest, method, transferred, time.time()))
+
+	def materialize(self, videoId:str, fileName:str):
+		'''
+			Links fileName to the object of a video if the store has it, so it doesn't have to be downloaded
+				Parameters:
+					videoId: the animelon id of the video
+					fileName: the episode file to create
+				Returns:
+					the method used to link it, or None if the video isn't in the store or can't be linked
+		'''
+		rows = self.execute("SELECT videos.hash, objects.size FROM videos JOIN objects ON videos.hash = objects.hash WHERE videoId = ?", (videoId,))
+		if len(rows) == 0:
+			return (None)
+		digest, size = rows[0]
+		objectName = self.objectPath(digest)
+		if not os.path.isfile(objectName) or os.path.getsize(objectName) != size:
+			# the object was removed or damaged, the video is downloaded again and replaces it
+			self.execute("DELETE FROM objects WHERE hash = ?", (digest,))
+			return (None)
+		try:
+			method = self.link(objectName, fileName)
+		except OSError:
+			return (None)
+		self.record(fileName, digest, method, 0)
+		return (method)
+
+	def add(self, videoId:str, fileName:str):
+		'''
+			Adds a downloaded video to the store: it becomes the object of its content,
+			or is replaced by a link to the existing object with the same content
+				Parameters:
+					videoId: the animelon id of the video
+					fileName: the downloaded episode file
+				Returns:
+					the method linking fileName to its object, or None if it can't be linked (another file system)
+		'''
+		digest = self.hashFile(fileName)
+		objectName = self.objectPath(digest)
+		size = os.path.getsize(fileName)
+		os.makedirs(os.path.dirname(objectName), exist_ok=True)
+		try:
+			if os.path.isfile(objectName) and os.path.getsize(objectName) != size:
+				# a damaged object is replaced by the new download
+				os.remove(objectName)
+			try:
+				# the downloaded file becomes the object, nothing is copied
+				os.link(fileName, objectName)
+				method = "hardlink"
+			except FileExistsError:
+				method = self.link(objectName, fileName)
+		except OSError:
+			return (None)
+		self.checkFork()
+		with self.lock:
+			connection = self.connect()
+			connection.execute("BEGIN IMMEDIATE")
+			try:
+				connection.execute("INSERT OR IGNORE INTO objects (hash, size, created) VALUES (?, ?, ?)", (digest, size, time.time()))
+				connection.execute("INSERT OR REPLACE INTO videos (videoId, hash) VALUES (?, ?)", (videoId, digest))
+				connection.execute("COMMIT")
+			except:
+				connection.execute("ROLLBACK")
+				raise
+		self.record(fileName, digest, method, size)
+		return (method)
+
+	def report(self):
+		'''
+			Returns:
+				a dict with the number of objects and of the episode files still linked to them, the bytes stored,
+				the bytes of the episode files, the bytes saved on the disk and the bytes and downloads avoided
+		'''
+		report = { "objects" : 0, "files" : 0, "storedBytes" : 0, "fileBytes" : 0, "savedBytes" : 0, "avoidedDownloads" : 0, "avoidedBytes" : 0 }
+		sizes = dict(self.execute("SELECT hash, size FROM objects"))
+		report["objects"] = len(sizes)
+		report["storedBytes"] = sum(sizes.values())
+		for path, digest, transferred in self.execute("SELECT path, hash, transferred FROM links"):
+			if digest not in sizes or not os.path.isfile(path) or os.path.getsize(path) != sizes[digest]:
+				continue
+			report["files"] += 1
+			report["fileBytes"] += sizes[digest]
+			if transferred == 0:
+				report["avoidedDownloads"] += 1
+				report["avoidedBytes"] += sizes[digest]
+		report["savedBytes"] = report["fileBytes"] - report["storedBytes"]
+		return (report)
@@ -0,0 +1,306 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock, Event
+import time
+import sys
+import os
+
+class DownloadCancelled(BaseException):
+	'''
+		Raised in the thread of a download whose job was cancelled, at its next chunk, request or retry.
+		Like asyncio's CancelledError it isn't an Exception, so the retry loops of the downloader let it through.
+	'''
+	pass
+
+class JobError(IOError):
+	'''
+		Raised by DownloadJob.result when some episodes of a job could not be downloaded
+	'''
+	def __init__(self, message:str, files:list, errors:list):
+		super().__init__(message)
+		self.files = files
+		self.errors = errors
+
+class DownloadJob:
+	'''
+		Handle of a series or video page submitted to a DownloadPool: its status, its progress, the files it downloaded,
+		and a way to cancel it. The downloads of a cancelled job stop at their next chunk and keep their .part file,
+		so submitting the url again resumes them.
+	'''
+	def __init__(self, jobId:int, url:str):
+		self.id = jobId
+		self.url = url
+		# pending, running, completed, failed or cancelled
+		self.status = "pending"
+		self.episodes = None
+		self.finishedEpisodes = 0
+		self.bytes = 0
+		self.files = []
+		self.errors = []
+		self.created = time.time()
+		self.lock = Lock()
+		self.cancelled = Event()
+		self.finished = Event()
+		self.callbacks = []
+
+	def __repr__(self):
+		return ('DownloadJob(id=%d, url="%s", status="%s", episodes=%s/%s, bytes=%d)'
+			% (self.id, self.url, self.status, self.finishedEpisodes, self.episodes, self.bytes))
+
+	def cancel(self):
+		'''
+			Cancels the job, its running downloads stop at their next chunk and its pending episodes are skipped
+				Returns:
+					False if the job was already finished
+		'''
+		if self.finished.is_set():
+			return (False)
+		self.cancelled.set()
+		return (True)
+
+	def done(self):
+		'''
+			Returns:
+				True once the job completed, failed or was cancelled
+		'''
+		return (self.finished.is_set())
+
+	def wait(self, timeout:float=None):
+		'''
+			Waits for the job to finish
+				Returns:
+					False if it is still running after timeout seconds
+		'''
+		return (self.finished.wait(timeout))
+
+	def result(self, timeout:float=None):
+		'''
+			Waits for the job to finish
+				Returns:
+					the list of the video (or subtitle only) file names of the job
+				Raises:
+					TimeoutError if it is still running after timeout seconds, DownloadCancelled if it was cancelled,
+					JobError if some of its episodes failed
+		'''
+		if not self.finished.wait(timeout):
+			raise TimeoutError("Job %d is still %s" % (self.id, self.status))
+		if self.status == "cancelled":
+			raise DownloadCancelled("Job %d was cancelled" % (self.id))
+		if self.status == "failed":
+			raise JobError("Job %d : %d episodes failed" % (self.id, len(self.errors)), list(self.files), list(self.errors))
+		return (list(self.files))
+
+	def progress(self):
+		'''
+			Returns:
+				a dict with the status of the job, its number of episodes (None until its url is listed), of finished episodes,
+				the bytes of video transferred, the files downloaded and the errors so far
+		'''
+		with self.lock:
+			return ({ "id" : self.id, "url" : self.url, "status" : self.status, "episodes" : self.episodes,
+				"finishedEpisodes" : self.finishedEpisodes, "bytes" : self.bytes, "files" : list(self.files), "errors" : list(self.errors) })
+
+	def addDoneCallback(self, function):
+		'''
+			Calls function(job) once the job is finished, from the thread that finishes it, or right away if it already is
+		'''
+		with self.lock:
+			if not self.finished.is_set():
+				self.callbacks.append(function)
+				return
+		function(self)
+
+	def checkCancelled(self):
+		'''
+			Raises DownloadCancelled if the job was cancelled
+		'''
+		if self.cancelled.is_set():
+			raise DownloadCancelled("Job %d was cancelled" % (self.id))
+
+	def advance(self, size:int):
+		'''
+			Counts size more bytes transferred, called by the downloader after each chunk
+				Raises:
+					DownloadCancelled if the job was cancelled, to stop the transfer
+		'''
+		with self.lock:
+			self.bytes += size
+		self.checkCancelled()
+
+	def start(self, episodes:int):
+		with self.lock:
+			self.episodes = episodes
+			if self.status == "pending":
+				self.status = "running"
+		if episodes == 0:
+			self.finish()
+
+	def finishEpisode(self, fileName:str=None, error:str=None):
+		'''
+			Records the result of an episode, the job finishes with its last episode
+		'''
+		with self.lock:
+			self.finishedEpisodes += 1
+			if fileName is not None:
+				self.files.append(fileName)
+			if error is not None:
+				self.errors.append(error)
+			last = self.episodes is not None and self.finishedEpisodes >= self.episodes
+		if last:
+			self.finish()
+
+	def finish(self, error:str=None):
+		with self.lock:
+			if self.finished.is_set():
+				return
+			if error is not None:
+				self.errors.append(error)
+			if self.cancelled.is_set():
+				self.status = "cancelled"
+			elif len(self.errors) > 0 or self.episodes == 0:
+				self.status = "failed"
+			else:
+				self.status = "completed"
+			self.finished.set()
+			callbacks, self.callbacks = self.callbacks, []
+		for function in callbacks:
+			try:
+				function(self)
+			except Exception as e:
+				print ("Error in the callback of job ", self.id, "(", e, ")", file=sys.stderr)
+
+class DownloadPool:
+	'''
+		Pool of threads downloading the jobs submitted by a program embedding the downloader, without blocking it.
+		A job is a series or video page url, each of its episodes is downloaded by a thread of the pool,
+		so thousands of jobs can be submitted while `workers` episodes transfer at once.
+		The threads share the session pool, the rate limiters and the bandwidth limiter of the downloader.
+	'''
+	def __init__(self, downloader, workers:int=None):
+		'''
+			Initialize the pool
+				Parameters:
+					downloader: the AnimelonDownloader downloading the episodes
+					workers: the number of episodes downloaded at once, defaults to the processMax of the downloader
+		'''
+		self.downloader = downloader
+		self.workers = workers or downloader.processMax
+		self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="animelon")
+		self.lock = Lock()
+		self.jobs = {}
+		self.lastId = 0
+		self.closed = False
+
+	def __repr__(self):
+		return ('DownloadPool(workers=%d, jobs=%d)' % (self.workers, len(self.jobs)))
+
+	def submit(self, url:str, seasonsToDownload:list=None, episodesToDownload:dict=None):
+		'''
+			Queues the download of a series or video page url
+				Parameters:
+					url: url of the video or series page
+					seasonsToDownload: list of seasons to download
+					episodesToDownload: dict of episodes to download, keys are season number, values are list of episode numbers
+				Returns:
+					the DownloadJob of the url
+		'''
+		with self.lock:
+			if self.closed:
+				raise RuntimeError("The download pool is shut down")
+			self.lastId += 1
+			job = DownloadJob(self.lastId, url)
+			self.jobs[job.id] = job
+		self.executor.submit(self.plan, job, seasonsToDownload, episodesToDownload)
+		return (job)
+
+	def get(self, jobId:int):
+		'''
+			Returns:
+				the job with this id, or None
+		'''
+		return (self.jobs.get(jobId))
+
+	def forget(self, job:DownloadJob):
+		'''
+			Removes a finished job from the pool, so that a long running service doesn't keep every job it ever ran
+		'''
+		if job.done():
+			with self.lock:
+				self.jobs.pop(job.id, None)
+
+	def plan(self, job:DownloadJob, seasonsToDownload:list=None, episodesToDownload:dict=None):
+		'''
+			Lists the episodes of a job and queues one task per episode, run by a thread of the pool
+		'''
+		self.downloader.currentJob.job = job
+		try:
+			job.checkCancelled()
+			episodes = self.downloader.listEpisodes(job.url, seasonsToDownload, episodesToDownload)
+		except DownloadCancelled:
+			job.start(0)
+			return
+		except Exception as e:
+			job.finish(repr(e))
+			return
+		finally:
+			self.downloader.currentJob.job = None
+		if len(episodes) == 0:
+			job.finish("no episode found at %s" % (job.url))
+			return
+		job.start(len(episodes))
+		for videoId, fileName, seriesName in episodes:
+			try:
+				self.executor.submit(self.downloadEpisode, job, videoId, fileName, seriesName)
+			except RuntimeError:
+				# the pool was shut down without waiting for this job
+				job.finishEpisode(None, "%s : the download pool is shut down" % (videoId))
+
+	def downloadEpisode(self, job:DownloadJob, videoId:str, fileName:str=None, seriesName:str=None):
+		'''
+			Downloads an episode of a job in the current thread, cancelled episodes are skipped
+		'''
+		downloader = self.downloader
+		file, error = None, None
+		downloader.currentJob.job = job
+		try:
+			job.checkCancelled()
+			action = downloader.planEpisode(videoId, fileName) if fileName is not None else "video"
+			if action is None:
+				file = fileName
+			else:
+				if fileName is not None:
+					os.makedirs(os.path.dirname(fileName), exist_ok=True)
+				file = downloader.downloadFromVideoPage(id=videoId, fileName=fileName, seriesName=seriesName, subtitlesOnly=action == "subtitles")
+				if file is None and action == "video" and not downloader.subtitlesOnly:
+					error = "%s : download failed" % (videoId)
+		except DownloadCancelled:
+			pass
+		except Exception as e:
+			error = "%s : %r" % (videoId, e)
+		finally:
+			downloader.currentJob.job = None
+			job.finishEpisode(file, error)
+
+	def cancelAll(self):
+		'''
+			Cancels every job that isn't finished
+		'''
+		for job in list(self.jobs.values()):
+			job.cancel()
+
+	def shutdown(self, wait=True, cancel=False):
+		'''
+			Stops accepting jobs
+				Parameters:
+					wait: if True, waits for the submitted jobs to finish
+					cancel: if True, the submitted jobs are cancelled first
+		'''
+		with self.lock:
+			self.closed = True
+			jobs = list(self.jobs.values())
+		if cancel:
+			self.cancelAll()
+		if wait:
+			# a job still being listed queues its episodes later, the executor only stops once they are done
+			for job in jobs:
+				job.wait()
+		self.executor.shutdown(wait=wait)
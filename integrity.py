@@ -0,0 +1,143 @@
+import hashlib
+import json
+import time
+import os
+
+class IntegrityError(IOError):
+	'''
+		Raised when the bytes of a video can't be trusted, like a resumed download whose video changed on the CDN
+	'''
+	pass
+
+class IntegrityStore:
+	'''
+		Integrity records of the downloaded videos, each kept in fileName + ".integrity" next to its video.
+		A record holds what was checked while the video streamed: its size, the ETag and Last-Modified of the CDN
+		and optionally a hash of each downloaded byte range, so a library can be checked later with a stat only,
+		or by hashing the files again.
+	'''
+	def __init__(self, algorithm:str=None):
+		'''
+			Initialize the store
+				Parameters:
+					algorithm: the hashlib algorithm of the hashes computed during downloads (sha256, md5, blake2b...), None to skip hashing
+		'''
+		if algorithm is not None:
+			hashlib.new(algorithm)
+		self.algorithm = algorithm
+
+	def __repr__(self):
+		return ('IntegrityStore(algorithm=%s)' % (self.algorithm))
+
+	def recordPath(self, fileName:str):
+		return (fileName + ".integrity")
+
+	def newHasher(self, algorithm:str=None):
+		'''
+			Returns:
+				a new hash object of algorithm (defaults to self.algorithm), or None if hashing is disabled
+		'''
+		algorithm = algorithm or self.algorithm
+		return (hashlib.new(algorithm) if algorithm is not None else None)
+
+	def hashRange(self, fileName:str, start:int, end:int, hasher=None, algorithm:str=None, bufferSize:int=4 * 1024 ** 2):
+		'''
+			Hashes the bytes [start, end[ of a file
+				Parameters:
+					fileName: the file to read
+					start: the first byte
+					end: the byte after the last one
+					hasher: the hash object to update, a new one is created if None
+					algorithm: the algorithm of the new hash object
+				Returns:
+					the updated hash object
+		'''
+		if hasher is None:
+			hasher = self.newHasher(algorithm)
+		buffer = bytearray(max(0, min(bufferSize, end - start)))
+		view = memoryview(buffer)
+		with open(fileName, 'rb') as f:
+			f.seek(start)
+			while start < end:
+				size = f.readinto(view[:min(len(view), end - start)])
+				if not size:
+					break
+				hasher.update(view[:size])
+				start += size
+		return (hasher)
+
+	def save(self, fileName:str, size:int, etag:str=None, lastModified:str=None, hashes:list=None, algorithm:str=None):
+		'''
+			Writes the record of a complete video
+				Parameters:
+					fileName: the video
+					size: the size announced by the CDN, which was checked against the bytes written
+					etag: the ETag header of the CDN
+					lastModified: the Last-Modified header of the CDN
+					hashes: a list of [start, end, hexdigest] of the byte ranges hashed while downloading, end included
+					algorithm: the algorithm of the hashes
+		'''
+		record = { "size" : size, "etag" : etag, "lastModified" : lastModified, "algorithm" : algorithm if hashes else None,
+			"hashes" : hashes or [], "completed" : time.time(), "mtime" : os.path.getmtime(fileName), "corrupt" : None }
+		with open(self.recordPath(fileName) + ".tmp", 'w') as f:
+			json.dump(record, f)
+		os.replace(self.recordPath(fileName) + ".tmp", self.recordPath(fileName))
+
+	def touch(self, fileName:str):
+		'''
+			Records the new mtime of a video whose file was replaced by one with the same bytes, like a link to the content store,
+			so that it isn't taken for a modified video and hashed again
+		'''
+		record = self.load(fileName)
+		if record is None:
+			return
+		record["mtime"] = os.path.getmtime(fileName)
+		with open(self.recordPath(fileName) + ".tmp", 'w') as f:
+			json.dump(record, f)
+		os.replace(self.recordPath(fileName) + ".tmp", self.recordPath(fileName))
+
+	def load(self, fileName:str):
+		'''
+			Returns:
+				the record of a video, or None if it has none
+		'''
+		try:
+			with open(self.recordPath(fileName), 'r') as f:
+				return (json.load(f))
+		except (OSError, ValueError):
+			return (None)
+
+	def markCorrupt(self, fileName:str, reason:str):
+		'''
+			Flags a video as corrupt, so the next run downloads it again
+		'''
+		record = self.load(fileName) or { "size" : None, "hashes" : [] }
+		record["corrupt"] = reason
+		with open(self.recordPath(fileName), 'w') as f:
+			json.dump(record, f)
+
+	def check(self, fileName:str, deep=False):
+		'''
+			Checks a video against its record
+				Parameters:
+					fileName: the video
+					deep: if True, the recorded hashes are computed again from the file,
+						they are anyway if the file was modified since its record was written
+				Returns:
+					(True, None) if the video matches its record, (False, reason) if it is corrupt, (None, None) if it has no record
+		'''
+		record = self.load(fileName)
+		if record is None:
+			return ((None, None))
+		if record.get("corrupt"):
+			return ((False, record["corrupt"]))
+		if not os.path.isfile(fileName):
+			return ((False, "missing"))
+		size = os.path.getsize(fileName)
+		if record["size"] is not None and size != record["size"]:
+			return ((False, "size %d instead of %d" % (size, record["size"])))
+		if deep or os.path.getmtime(fileName) != record.get("mtime", os.path.getmtime(fileName)):
+			for start, end, digest in record["hashes"]:
+				if self.hashRange(fileName, start, end + 1, algorithm=record["algorithm"]).hexdigest() != digest:
+					return ((False, "%s mismatch in bytes %d-%d" % (record["algorithm"], start, end)))
+		return ((True, None))
@@ -0,0 +1,145 @@
+from threading import Lock
+import sqlite3
+import time
+import os
+
+class LibraryState:
+	'''
+		SQLite record of every downloaded video: its file, size, quality and the subtitle types already saved,
+		and of the video URL (user agent and quality) that worked last for each series.
+		Safe to share between the threads and the forked processes of a downloader.
+	'''
+	def __init__(self, path:str):
+		'''
+			Initialize the state store
+				Parameters:
+					path: the SQLite file of the store
+		'''
+		self.path = path
+		self.lock = Lock()
+		self.connection = None
+		self.pid = None
+
+	def __repr__(self):
+		return ('LibraryState(path="%s")' % (self.path))
+
+	def __getstate__(self):
+		state = self.__dict__.copy()
+		state["connection"] = None
+		state["pid"] = None
+		del state["lock"]
+		return (state)
+
+	def __setstate__(self, state):
+		self.__dict__.update(state)
+		self.lock = Lock()
+
+	def checkFork(self):
+		'''
+			Forgets the connection inherited from the parent process, a connection is never shared with a forked child
+		'''
+		if self.pid != os.getpid():
+			self.pid = os.getpid()
+			self.lock = Lock()
+			self.connection = None
+
+	def connect(self):
+		'''
+			Returns:
+				the SQLite connection of the current process, to be used with self.lock held
+		'''
+		if self.connection is None:
+			self.connection = sqlite3.connect(self.path, timeout=60, check_same_thread=False, isolation_level=None)
+			self.connection.execute("PRAGMA journal_mode=WAL")
+			self.connection.execute("CREATE TABLE IF NOT EXISTS videos (videoId TEXT PRIMARY KEY, path TEXT, size INTEGER, quality TEXT, "
+				+ "subtitles TEXT NOT NULL DEFAULT '', updated REAL NOT NULL)")
+			self.connection.execute("CREATE INDEX IF NOT EXISTS videosPath ON videos (path)")
+			self.connection.execute("CREATE TABLE IF NOT EXISTS candidates (seriesName TEXT PRIMARY KEY, userAgentKey TEXT NOT NULL, "
+				+ "quality TEXT NOT NULL, updated REAL NOT NULL)")
+		return (self.connection)
+
+	def get(self, videoId:str):
+		'''
+			Returns the record of a video
+				Parameters:
+					videoId: the animelon id of the video
+				Returns:
+					a dict with the path, size, quality and subtitles (a set of languageSub) of the video, or None if it was never recorded
+		'''
+		self.checkFork()
+		with self.lock:
+			row = self.connect().execute("SELECT path, size, quality, subtitles FROM videos WHERE videoId = ?", (videoId,)).fetchone()
+		if row is None:
+			return (None)
+		return ({ "path" : row[0], "size" : row[1], "quality" : row[2], "subtitles" : set(filter(None, row[3].split(","))) })
+
+	def getVideoId(self, path:str):
+		'''
+			Returns:
+				the id of the video recorded at path, or None
+		'''
+		self.checkFork()
+		with self.lock:
+			row = self.connect().execute("SELECT videoId FROM videos WHERE path = ? ORDER BY updated DESC LIMIT 1", (path,)).fetchone()
+		return (row[0] if row is not None else None)
+
+	def record(self, videoId:str, path:str=None, size:int=None, quality:str=None, subtitles=()):
+		'''
+			Records a video, the fields left to None keep their previous value
+				Parameters:
+					videoId: the animelon id of the video
+					path: the path of the video file
+					size: the size of the video file in bytes
+					quality: the quality of the video (ozez, stz, tsz)
+					subtitles: languageSub types saved for the video, added to the ones already recorded
+		'''
+		self.checkFork()
+		with self.lock:
+			connection = self.connect()
+			connection.execute("BEGIN IMMEDIATE")
+			try:
+				row = connection.execute("SELECT path, size, quality, subtitles FROM videos WHERE videoId = ?", (videoId,)).fetchone()
+				if row is None:
+					row = (None, None, None, "")
+				if path is None:
+					path, size, quality = row[0:3]
+				subtitles = ",".join(sorted(set(filter(None, row[3].split(","))) | set(subtitles)))
+				connection.execute("INSERT OR REPLACE INTO videos (videoId, path, size, quality, subtitles, updated) VALUES (?, ?, ?, ?, ?, ?)",
+					(videoId, path, size, quality, subtitles, time.time()))
+				connection.execute("COMMIT")
+			except:
+				connection.execute("ROLLBACK")
+				raise
+
+	def getPreferredCandidate(self, seriesName:str):
+		'''
+			Returns:
+				the (userAgentKey, quality) of the video URL that worked last for a series, or None
+		'''
+		self.checkFork()
+		with self.lock:
+			row = self.connect().execute("SELECT userAgentKey, quality FROM candidates WHERE seriesName = ?", (seriesName or "",)).fetchone()
+		return (tuple(row) if row is not None else None)
+
+	def setPreferredCandidate(self, seriesName:str, userAgentKey:str, quality:str):
+		'''
+			Records the video URL that worked for a series, so that every worker tries it first for the next episodes
+		'''
+		self.checkFork()
+		with self.lock:
+			self.connect().execute("INSERT OR REPLACE INTO candidates (seriesName, userAgentKey, quality, updated) VALUES (?, ?, ?, ?)",
+				(seriesName or "", userAgentKey, quality, time.time()))
+
+	def forget(self, videoId:str, subtitlesOnly=False):
+		'''
+			Removes the record of a video
+				Parameters:
+					videoId: the animelon id of the video
+					subtitlesOnly: if True, only the recorded subtitles are removed
+		'''
+		self.checkFork()
+		with self.lock:
+			if subtitlesOnly:
+				self.connect().execute("UPDATE videos SET subtitles = '' WHERE videoId = ?", (videoId,))
+			else:
+				self.connect().execute("DELETE FROM videos WHERE videoId = ?", (videoId,))
@@ -0,0 +1,102 @@
+from threading import Lock
+import sqlite3
+import time
+import os
+
+class MetadataCache:
+	'''
+		SQLite store of raw API responses, keyed by their url.
+		Safe to share between the threads and the forked processes of a downloader.
+	'''
+	def __init__(self, path:str, maxAge:float=30 * 24 * 3600):
+		'''
+			Initialize the cache
+				Parameters:
+					path: the SQLite file of the cache
+					maxAge: entries older than this many seconds are deleted when the cache is opened
+		'''
+		self.path = path
+		self.maxAge = maxAge
+		self.lock = Lock()
+		self.connection = None
+		self.pid = None
+		self.evict(maxAge)
+
+	def __repr__(self):
+		return ('MetadataCache(path="%s", maxAge=%d)' % (self.path, self.maxAge))
+
+	def __getstate__(self):
+		state = self.__dict__.copy()
+		state["connection"] = None
+		state["pid"] = None
+		del state["lock"]
+		return (state)
+
+	def __setstate__(self, state):
+		self.__dict__.update(state)
+		self.lock = Lock()
+
+	def checkFork(self):
+		'''
+			Forgets the connection inherited from the parent process, a connection is never shared with a forked child
+		'''
+		if self.pid != os.getpid():
+			self.pid = os.getpid()
+			self.lock = Lock()
+			self.connection = None
+
+	def connect(self):
+		'''
+			Returns:
+				the SQLite connection of the current process, to be used with self.lock held
+		'''
+		if self.connection is None:
+			self.connection = sqlite3.connect(self.path, timeout=60, check_same_thread=False, isolation_level=None)
+			self.connection.execute("PRAGMA journal_mode=WAL")
+			self.connection.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, fetched REAL NOT NULL, content BLOB NOT NULL)")
+		return (self.connection)
+
+	def get(self, key:str, ttl:float=None):
+		'''
+			Returns a cached response
+				Parameters:
+					key: the key of the response, usually its url
+					ttl: the maximum age of the response in seconds, None accepts any age
+				Returns:
+					the content of the response, or None if it is not cached or too old
+		'''
+		self.checkFork()
+		with self.lock:
+			row = self.connect().execute("SELECT fetched, content FROM responses WHERE key = ?", (key,)).fetchone()
+		if row is None or (ttl is not None and time.time() - row[0] > ttl):
+			return (None)
+		return (bytes(row[1]))
+
+	def put(self, key:str, content:bytes):
+		'''
+			Stores a response
+				Parameters:
+					key: the key of the response, usually its url
+					content: the content of the response
+		'''
+		self.checkFork()
+		with self.lock:
+			self.connect().execute("INSERT OR REPLACE INTO responses (key, fetched, content) VALUES (?, ?, ?)", (key, time.time(), content))
+
+	def delete(self, key:str):
+		'''
+			Removes a response from the cache
+		'''
+		self.checkFork()
+		with self.lock:
+			self.connect().execute("DELETE FROM responses WHERE key = ?", (key,))
+
+	def evict(self, maxAge:float):
+		'''
+			Deletes the responses older than maxAge seconds
+			Returns:
+				the number of deleted responses
+		'''
+		self.checkFork()
+		with self.lock:
+			return (self.connect().execute("DELETE FROM responses WHERE fetched < ?", (time.time() - maxAge,)).rowcount)
@@ -0,0 +1,172 @@
+from threading import Lock
+import json
+import time
+import os
+
+class RunMetrics:
+	'''
+		JSON-lines log of what a run does: every request, transfer, video, retry and episode is one event.
+		Every thread and forked process of a downloader appends to the same file, one write per line,
+		and the summary of the run is computed from the file once the workers are done.
+		Without a path, events are dropped.
+	'''
+	def __init__(self, path:str=None, prometheusPath:str=None):
+		'''
+			Initialize the metrics
+				Parameters:
+					path: the JSON-lines file the events are appended to, None disables the metrics
+					prometheusPath: the Prometheus textfile the summary is written to, None to skip it
+		'''
+		self.path = path
+		self.prometheusPath = prometheusPath
+		self.started = time.time()
+		# the file may hold previous runs, only the events after this offset belong to this one
+		self.offset = os.path.getsize(path) if path is not None and os.path.exists(path) else 0
+		self.lock = Lock()
+		self.fd = None
+		self.pid = None
+
+	def __repr__(self):
+		return ('RunMetrics(path="%s", prometheusPath="%s")' % (self.path, self.prometheusPath))
+
+	def __getstate__(self):
+		state = self.__dict__.copy()
+		state["fd"] = None
+		state["pid"] = None
+		del state["lock"]
+		return (state)
+
+	def __setstate__(self, state):
+		self.__dict__.update(state)
+		self.lock = Lock()
+
+	@property
+	def enabled(self):
+		return (self.path is not None)
+
+	def checkFork(self):
+		'''
+			Forgets the file descriptor inherited from the parent process
+		'''
+		if self.pid != os.getpid():
+			self.pid = os.getpid()
+			self.lock = Lock()
+			self.fd = None
+
+	def event(self, name:str, **fields):
+		'''
+			Appends an event to the log
+				Parameters:
+					name: the kind of event (request, transfer, video, retry, episode, subtitles, summary)
+					fields: the values of the event, they must be JSON serializable
+		'''
+		if self.path is None:
+			return
+		line = json.dumps(dict({ "time" : round(time.time(), 3), "pid" : os.getpid(), "event" : name }, **fields)) + "\n"
+		self.checkFork()
+		with self.lock:
+			if self.fd is None:
+				self.fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+			# a single write with O_APPEND keeps the lines of concurrent processes whole
+			os.write(self.fd, line.encode())
+
+	def events(self):
+		'''
+			Returns:
+				the events of this run, read back from the log
+		'''
+		if self.path is None or not os.path.exists(self.path):
+			return ([])
+		with open(self.path, 'rb') as f:
+			f.seek(self.offset)
+			return ([json.loads(line) for line in f if line.strip()])
+
+	def summarize(self):
+		'''
+			Aggregates the events of this run
+				Returns:
+					a dict of totals: episodes and videos by result, retries, transferred bytes and seconds per CDN host,
+					time to first byte, requests by host and status, and the qualities and user agent keys used
+		'''
+		summary = { "seconds" : round(time.time() - self.started, 3), "episodes" : {}, "videos" : {}, "retries" : 0, "subtitles" : 0,
+			"transfers" : {}, "requests" : {}, "qualities" : {}, "userAgentKeys" : {} }
+		ttfb = []
+		for event in self.events():
+			name = event["event"]
+			if name == "episode":
+				summary["episodes"][event["result"]] = summary["episodes"].get(event["result"], 0) + 1
+			elif name == "video":
+				summary["videos"][event["result"]] = summary["videos"].get(event["result"], 0) + 1
+				if event["result"] == "completed":
+					summary["qualities"][event["quality"]] = summary["qualities"].get(event["quality"], 0) + 1
+					summary["userAgentKeys"][event["userAgentKey"]] = summary["userAgentKeys"].get(event["userAgentKey"], 0) + 1
+			elif name == "retry":
+				summary["retries"] += 1
+			elif name == "subtitles":
+				summary["subtitles"] += event["count"]
+			elif name == "transfer":
+				host = summary["transfers"].setdefault(event["host"], { "count" : 0, "bytes" : 0, "seconds" : 0 })
+				host["count"] += 1
+				host["bytes"] += event["bytes"]
+				host["seconds"] += event["seconds"]
+				ttfb.append(event["ttfb"])
+			elif name == "request":
+				host = summary["requests"].setdefault(event["host"], { "count" : 0, "seconds" : 0, "statuses" : {} })
+				host["count"] += 1
+				host["seconds"] += event["seconds"]
+				status = str(event["status"])
+				host["statuses"][status] = host["statuses"].get(status, 0) + 1
+		for host in summary["transfers"].values():
+			host["bytesPerSecond"] = round(host["bytes"] / host["seconds"]) if host["seconds"] > 0 else None
+			host["seconds"] = round(host["seconds"], 3)
+		for host in summary["requests"].values():
+			host["seconds"] = round(host["seconds"], 3)
+		summary["ttfb"] = { "mean" : round(sum(ttfb) / len(ttfb), 3), "max" : round(max(ttfb), 3) } if len(ttfb) else None
+		return (summary)
+
+	def finish(self):
+		'''
+			Appends the summary of the run to the log and writes the Prometheus textfile, once every worker is done
+				Returns:
+					the summary, or None if the metrics are disabled
+		'''
+		if self.path is None:
+			return (None)
+		summary = self.summarize()
+		self.event("summary", **summary)
+		if self.prometheusPath is not None:
+			self.writePrometheus(summary)
+		return (summary)
+
+	def writePrometheus(self, summary:dict):
+		'''
+			Writes the summary in the Prometheus text format, for the textfile collector of node_exporter
+				Parameters:
+					summary: the summary returned by summarize
+		'''
+		def label(value):
+			return (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+		metrics = [
+			("animelon_run_seconds", "Duration of the last run", [("", summary["seconds"])]),
+			("animelon_run_timestamp_seconds", "End of the last run", [("", round(time.time(), 3))]),
+			("animelon_episodes", "Episodes of the last run by result", [('result="%s"' % label(result), count) for result, count in summary["episodes"].items()]),
+			("animelon_videos", "Videos of the last run by result", [('result="%s"' % label(result), count) for result, count in summary["videos"].items()]),
+			("animelon_retries", "Episode retries of the last run", [("", summary["retries"])]),
+			("animelon_subtitles", "Subtitles saved by the last run", [("", summary["subtitles"])]),
+			("animelon_transfer_bytes", "Bytes downloaded from each CDN host", [('host="%s"' % label(host), values["bytes"]) for host, values in summary["transfers"].items()]),
+			("animelon_transfer_seconds", "Time spent downloading from each CDN host", [('host="%s"' % label(host), values["seconds"]) for host, values in summary["transfers"].items()]),
+			("animelon_ttfb_seconds_mean", "Mean time to first byte of the video transfers", [("", summary["ttfb"]["mean"])] if summary["ttfb"] else []),
+			("animelon_requests", "Requests of the last run by host and status",
+				[('host="%s",status="%s"' % (label(host), label(status)), count) for host, values in summary["requests"].items() for status, count in values["statuses"].items()]),
+			("animelon_video_quality", "Completed videos by quality", [('quality="%s"' % label(quality), count) for quality, count in summary["qualities"].items()]),
+		]
+		lines = []
+		for name, description, samples in metrics:
+			lines.append("# HELP %s %s" % (name, description))
+			lines.append("# TYPE %s gauge" % name)
+			for labels, value in samples:
+				lines.append("%s%s %s" % (name, "{" + labels + "}" if labels else "", value))
+		# the collector must never read a half written file
+		with open(self.prometheusPath + ".tmp", 'w') as f:
+			f.write("\n".join(lines) + "\n")
+		os.replace(self.prometheusPath + ".tmp", self.prometheusPath)
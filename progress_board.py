@@ -0,0 +1,153 @@
+from threading import Thread, Event
+import shutil
+import time
+import sys
+import os
+
+DONE, TOTAL, STARTED, ACTIVE = range(4)
+FIELDS = 4
+NAME_SIZE = 64
+
+class ProgressBoard:
+	'''
+		Single progress line for every download of a downloader.
+		Workers report into slots in shared memory, so the threads and forked processes all feed the same board,
+		and reporting a chunk is a single addition. A thread of the process that created the board
+		redraws the line at a fixed rate with the total and per-download throughput.
+	'''
+	def __init__(self, slots:int=16, refreshRate:float=2, show=True, stream=sys.stderr):
+		'''
+			Initialize the board
+				Parameters:
+					slots: the maximum number of downloads shown at once, extra downloads are counted in the total only
+					refreshRate: the number of redraws per second
+					show: if False, nothing is drawn
+					stream: where the progress line is drawn
+		'''
+		self.slots = slots
+		self.refreshRate = refreshRate
+		self.stream = stream
+		from multiprocessing import RawArray, Lock
+		self.lock = Lock()
+		self.state = RawArray('d', slots * FIELDS)
+		self.names = RawArray('c', slots * NAME_SIZE)
+		# bytes of the downloads that already left their slot
+		self.finished = RawArray('d', 2)
+		self.stopped = Event()
+		self.thread = None
+		self.pid = os.getpid()
+		self.lineDrawn = False
+		if show:
+			self.thread = Thread(target=self.render, daemon=True)
+			self.thread.start()
+
+	def __repr__(self):
+		return ('ProgressBoard(slots=%d, refreshRate=%.1f)' % (self.slots, self.refreshRate))
+
+	def start(self, name:str, total:int, done:int=0):
+		'''
+			Reserves a slot for a download
+				Parameters:
+					name: the name shown for the download
+					total: the size of the download in bytes
+					done: the number of bytes already downloaded
+				Returns:
+					the slot to pass to advance and finish, None if every slot is taken
+		'''
+		with self.lock:
+			for slot in range(self.slots):
+				base = slot * FIELDS
+				if self.state[base + ACTIVE] == 0:
+					encoded = name.encode('utf-8')[:NAME_SIZE - 1]
+					self.names[slot * NAME_SIZE:(slot + 1) * NAME_SIZE] = encoded + b"\0" * (NAME_SIZE - len(encoded))
+					self.state[base + DONE] = done
+					self.state[base + TOTAL] = total
+					self.state[base + STARTED] = time.time()
+					self.state[base + ACTIVE] = 1
+					return (slot)
+		return (None)
+
+	def advance(self, slot, size:int):
+		'''
+			Reports size more bytes for the download of slot, a slot is only advanced by the worker that owns it
+		'''
+		if slot is not None:
+			self.state[slot * FIELDS + DONE] += size
+
+	def finish(self, slot):
+		'''
+			Frees the slot of a finished or failed download
+		'''
+		if slot is None:
+			return
+		with self.lock:
+			base = slot * FIELDS
+			self.finished[0] += self.state[base + DONE]
+			self.finished[1] += 1
+			self.state[base + ACTIVE] = 0
+
+	def format(self, rate:float):
+		'''
+			Returns:
+				the progress line
+		'''
+		now = time.time()
+		downloads = []
+		total = self.finished[0]
+		for slot in range(self.slots):
+			base = slot * FIELDS
+			if self.state[base + ACTIVE]:
+				done, size, started = self.state[base + DONE], self.state[base + TOTAL], self.state[base + STARTED]
+				total += done
+				name = self.names[slot * NAME_SIZE:(slot + 1) * NAME_SIZE].split(b"\0")[0].decode('utf-8', 'replace')
+				downloads.append("%s %d%% %.1f MB/s" % (name, 100 * done / size if size else 0, done / max(now - started, 1e-3) / 1024 ** 2))
+		line = "[%d active, %d done] %.1f MB %.1f MB/s" % (len(downloads), self.finished[1], total / 1024 ** 2, rate / 1024 ** 2)
+		return (" | ".join([line] + downloads))
+
+	def total(self):
+		'''
+			Returns:
+				the number of bytes downloaded so far
+		'''
+		return (self.finished[0] + sum(self.state[slot * FIELDS + DONE] for slot in range(self.slots) if self.state[slot * FIELDS + ACTIVE]))
+
+	def render(self):
+		'''
+			Redraws the progress line until the board is closed, on a terminal the line is overwritten in place
+			otherwise a line is printed every 10 seconds
+		'''
+		interactive = self.stream.isatty()
+		period = 1 / self.refreshRate if interactive else 10
+		last, lastTime, rate = self.total(), time.time(), 0
+		drawn = False
+		while not self.stopped.wait(period):
+			now = time.time()
+			total = self.total()
+			# smoothed over a few refreshes so the rate doesn't jump with every chunk
+			rate = 0.7 * rate + 0.3 * (total - last) / (now - lastTime)
+			last, lastTime = total, now
+			active = any(self.state[slot * FIELDS + ACTIVE] for slot in range(self.slots))
+			if not active and not drawn:
+				continue
+			line = self.format(rate)
+			if interactive:
+				width = shutil.get_terminal_size().columns - 1
+				self.stream.write("\r\033[K" + line[:width])
+				self.lineDrawn = True
+			else:
+				self.stream.write(line + "\n")
+			self.stream.flush()
+			drawn = active
+
+	def close(self):
+		'''
+			Stops redrawing, leaves the last line on screen
+		'''
+		if self.thread is None or os.getpid() != self.pid:
+			return
+		self.stopped.set()
+		self.thread.join()
+		self.thread = None
+		if self.lineDrawn:
+			self.stream.write("\n")
+			self.stream.flush()
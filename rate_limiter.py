@@ -0,0 +1,105 @@
+import random
+import time
+
+TOKENS, REFILLED, RATE, BACKOFF_UNTIL, FAILURES = range(5)
+
+class RateLimiter:
+	'''
+		Token bucket limiting the number of requests per second sent to a host.
+		Its state lives in shared memory, so every thread and forked process of a downloader draws from the same budget.
+		The rate is halved and requests are paused with an exponential backoff (plus jitter) when the host throttles,
+		and it grows back to maxRate while responses stay healthy.
+	'''
+	def __init__(self, maxRate:float, minRate:float=0.05, burst:float=1, throttleStatusCodes=(403, 429), backoffBase:float=1,
+				backoffMax:float=120):
+		'''
+			Initialize the limiter
+				Parameters:
+					maxRate: the maximum number of requests per second, also the starting rate, 0 for no limit
+					minRate: the rate never goes below this many requests per second
+					burst: the number of requests that can be sent at once after an idle period
+					throttleStatusCodes: the HTTP status codes meaning that the host is throttling us, 5xx are always included
+					backoffBase: the first backoff in seconds, doubled after each consecutive throttled response
+					backoffMax: the maximum backoff in seconds
+		'''
+		self.maxRate = maxRate
+		self.minRate = min(minRate, maxRate)
+		self.burst = burst
+		self.throttleStatusCodes = throttleStatusCodes
+		self.backoffBase = backoffBase
+		self.backoffMax = backoffMax
+		# imported when a limiter is created, so that animelon_dl -h never loads multiprocessing
+		from multiprocessing import RawArray, Lock
+		self.lock = Lock()
+		self.state = RawArray('d', 5)
+		self.state[TOKENS] = burst
+		self.state[REFILLED] = time.time()
+		self.state[RATE] = maxRate
+
+	def __repr__(self):
+		return ('RateLimiter(rate=%.2f, maxRate=%.2f, failures=%d)' % (self.state[RATE], self.maxRate, self.state[FAILURES]))
+
+	@property
+	def rate(self):
+		'''
+			The current number of requests per second
+		'''
+		return (self.state[RATE])
+
+	def acquire(self):
+		'''
+			Waits until a request can be sent
+		'''
+		while True:
+			with self.lock:
+				now = time.time()
+				state = self.state
+				state[TOKENS] = min(self.burst, state[TOKENS] + (now - state[REFILLED]) * state[RATE])
+				state[REFILLED] = now
+				if now < state[BACKOFF_UNTIL]:
+					delay = state[BACKOFF_UNTIL] - now
+				elif self.maxRate <= 0:
+					# no limit, only the backoff of a throttled host pauses the requests
+					return
+				elif state[TOKENS] >= 1:
+					state[TOKENS] -= 1
+					return
+				else:
+					delay = (1 - state[TOKENS]) / state[RATE]
+			time.sleep(delay)
+
+	def isThrottled(self, statusCode):
+		'''
+			Returns:
+				True if statusCode means that the host is throttling us, None stands for a connection error
+		'''
+		return (statusCode is None or statusCode >= 500 or statusCode in self.throttleStatusCodes)
+
+	def feedback(self, statusCode, retryAfter=None):
+		'''
+			Adapts the rate to the response of a request
+				Parameters:
+					statusCode: the HTTP status code of the response, None for a connection error
+					retryAfter: the Retry-After header of the response, if any
+				Returns:
+					the backoff in seconds imposed on every worker, 0 if the response was healthy
+		'''
+		with self.lock:
+			state = self.state
+			if not self.isThrottled(statusCode):
+				state[FAILURES] = 0
+				# additive increase
+				state[RATE] = min(self.maxRate, state[RATE] + self.maxRate / 20)
+				return (0)
+			# multiplicative decrease
+			state[FAILURES] += 1
+			state[RATE] = max(self.minRate, state[RATE] / 2)
+			state[TOKENS] = min(state[TOKENS], 0)
+			delay = min(self.backoffMax, self.backoffBase * 2 ** (state[FAILURES] - 1))
+			delay = random.uniform(delay / 2, delay)
+			try:
+				delay = max(delay, min(self.backoffMax, float(retryAfter)))
+			except (TypeError, ValueError):
+				pass
+			state[BACKOFF_UNTIL] = max(state[BACKOFF_UNTIL], time.time() + delay)
+			return (delay)
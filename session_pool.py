@@ -0,0 +1,101 @@
+from urllib.parse import urlsplit
+from threading import Lock
+import os
+
+class SessionPool:
+	'''
+		Keep-alive requests sessions shared by every request of a downloader, one per (host, user agent).
+		Each session only ever sends its own user agent, so concurrent downloads never race on headers.
+	'''
+	def __init__(self, poolConnections:int=2, poolMaxSize:int=10):
+		'''
+			Initialize the pool
+				Parameters:
+					poolConnections: the number of connection pools cached by each session
+					poolMaxSize: the maximum number of keep-alive connections kept per host
+		'''
+		self.poolConnections = poolConnections
+		self.poolMaxSize = poolMaxSize
+		self.sessions = {}
+		self.lock = Lock()
+		self.pid = os.getpid()
+
+	def __repr__(self):
+		return ('SessionPool(poolConnections=%d, poolMaxSize=%d, sessions=%s)' % (self.poolConnections, self.poolMaxSize, list(self.sessions.keys())))
+
+	def __getstate__(self):
+		'''
+			Sessions and locks are not shared with other processes
+		'''
+		state = self.__dict__.copy()
+		state["sessions"] = {}
+		del state["lock"]
+		return (state)
+
+	def __setstate__(self, state):
+		self.__dict__.update(state)
+		self.lock = Lock()
+
+	def key(self, url, userAgent:str):
+		'''
+			Returns:
+				the (host, user agent) key of the session used for url
+		'''
+		parts = urlsplit(url)
+		return ((parts.scheme + "://" + parts.netloc, userAgent))
+
+	def checkFork(self):
+		'''
+			Forgets the sessions inherited from the parent process, their sockets are shared with it
+		'''
+		if self.pid != os.getpid():
+			self.pid = os.getpid()
+			self.lock = Lock()
+			self.sessions = {}
+
+	def put(self, url, userAgent:str, session):
+		'''
+			Adds an existing session to the pool
+				Parameters:
+					url: any url of the host the session is used for
+					userAgent: the user agent the session sends
+					session: the requests session
+		'''
+		self.checkFork()
+		session.headers.update({ "User-Agent": userAgent })
+		with self.lock:
+			self.sessions[self.key(url, userAgent)] = session
+
+	def get(self, url, userAgent:str):
+		'''
+			Returns the session to use for url with userAgent, creating it if needed
+				Parameters:
+					url: the url about to be requested
+					userAgent: the user agent to send
+				Returns:
+					the requests session
+		'''
+		self.checkFork()
+		key = self.key(url, userAgent)
+		with self.lock:
+			session = self.sessions.get(key)
+			if session is None:
+				# requests is imported by the first request, not by the creation of a downloader
+				from requests import Session
+				from requests.adapters import HTTPAdapter
+				session = Session()
+				adapter = HTTPAdapter(pool_connections=self.poolConnections, pool_maxsize=self.poolMaxSize)
+				session.mount("http://", adapter)
+				session.mount("https://", adapter)
+				session.headers.update({ "User-Agent": userAgent })
+				self.sessions[key] = session
+		return (session)
+
+	def close(self):
+		'''
+			Closes every session of the pool
+		'''
+		with self.lock:
+			for session in self.sessions.values():
+				session.close()
+			self.sessions = {}
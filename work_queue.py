@@ -0,0 +1,166 @@
+from threading import Lock
+import sqlite3
+import time
+import os
+
+class WorkQueue:
+	'''
+		SQLite queue of episode jobs shared by downloaders on several machines.
+		A planner adds one job per episode, workers claim them with a lease they renew with heartbeats while downloading,
+		and a job whose lease expires (its worker crashed or lost the shared file system) is claimed again by another worker.
+		The queue may live on a shared file system, so it keeps SQLite's rollback journal: WAL needs the memory of a single host.
+		Safe to share between the threads and the forked processes of a downloader.
+	'''
+	def __init__(self, path:str, maxTries:int=5):
+		'''
+			Initialize the queue
+				Parameters:
+					path: the SQLite file of the queue
+					maxTries: the number of claims after which a job that keeps failing or being abandoned is given up
+		'''
+		self.path = path
+		self.maxTries = maxTries
+		self.lock = Lock()
+		self.connection = None
+		self.pid = None
+
+	def __repr__(self):
+		return ('WorkQueue(path="%s", maxTries=%d)' % (self.path, self.maxTries))
+
+	def __getstate__(self):
+		state = self.__dict__.copy()
+		state["connection"] = None
+		state["pid"] = None
+		del state["lock"]
+		return (state)
+
+	def __setstate__(self, state):
+		self.__dict__.update(state)
+		self.lock = Lock()
+
+	def checkFork(self):
+		'''
+			Forgets the connection inherited from the parent process, a connection is never shared with a forked child
+		'''
+		if self.pid != os.getpid():
+			self.pid = os.getpid()
+			self.lock = Lock()
+			self.connection = None
+
+	def connect(self):
+		'''
+			Returns:
+				the SQLite connection of the current process, to be used with self.lock held
+		'''
+		if self.connection is None:
+			self.connection = sqlite3.connect(self.path, timeout=60, check_same_thread=False, isolation_level=None)
+			self.connection.execute("CREATE TABLE IF NOT EXISTS jobs (id INTEGER PRIMARY KEY, videoId TEXT NOT NULL, path TEXT, seriesName TEXT, "
+				+ "status TEXT NOT NULL DEFAULT 'pending', tries INTEGER NOT NULL DEFAULT 0, worker TEXT, leaseExpires REAL, error TEXT, "
+				+ "created REAL NOT NULL, updated REAL NOT NULL, UNIQUE (videoId, path))")
+			self.connection.execute("CREATE INDEX IF NOT EXISTS jobsStatus ON jobs (status, leaseExpires)")
+		return (self.connection)
+
+	def transaction(self, function):
+		'''
+			Runs function(connection) in a write transaction, so that concurrent workers never claim the same job
+				Returns:
+					the return value of function
+		'''
+		self.checkFork()
+		with self.lock:
+			connection = self.connect()
+			connection.execute("BEGIN IMMEDIATE")
+			try:
+				result = function(connection)
+				connection.execute("COMMIT")
+			except:
+				connection.execute("ROLLBACK")
+				raise
+		return (result)
+
+	def add(self, jobs:list):
+		'''
+			Adds jobs to the queue, the jobs already queued are left as they are
+				Parameters:
+					jobs: a list of (videoId, path, seriesName) tuples, path is relative to the savePath of the workers
+				Returns:
+					the number of jobs added
+		'''
+		now = time.time()
+		def add(connection):
+			before = connection.total_changes
+			connection.executemany("INSERT OR IGNORE INTO jobs (videoId, path, seriesName, created, updated) VALUES (?, ?, ?, ?, ?)",
+				[(videoId, path, seriesName, now, now) for videoId, path, seriesName in jobs])
+			return (connection.total_changes - before)
+		return (self.transaction(add))
+
+	def claim(self, worker:str, leaseTime:float):
+		'''
+			Leases the oldest pending job, or a job whose lease expired
+				Parameters:
+					worker: the name of the worker
+					leaseTime: the number of seconds the job is leased for, unless it is renewed by heartbeat
+				Returns:
+					a dict with the id, videoId, path, seriesName and tries of the job, or None if no job can be claimed
+		'''
+		def claim(connection):
+			now = time.time()
+			connection.execute("UPDATE jobs SET status = 'failed', error = 'abandoned by ' || worker, updated = ? "
+				+ "WHERE status = 'leased' AND leaseExpires < ? AND tries >= ?", (now, now, self.maxTries))
+			row = connection.execute("SELECT id, videoId, path, seriesName, tries FROM jobs WHERE status = 'pending' "
+				+ "OR (status = 'leased' AND leaseExpires < ?) ORDER BY id LIMIT 1", (now,)).fetchone()
+			if row is None:
+				return (None)
+			connection.execute("UPDATE jobs SET status = 'leased', tries = tries + 1, worker = ?, leaseExpires = ?, updated = ? WHERE id = ?",
+				(worker, now + leaseTime, now, row[0]))
+			return ({ "id" : row[0], "videoId" : row[1], "path" : row[2], "seriesName" : row[3], "tries" : row[4] + 1 })
+		return (self.transaction(claim))
+
+	def heartbeat(self, jobId:int, worker:str, leaseTime:float):
+		'''
+			Renews the lease of a job
+				Returns:
+					False if the lease was lost to another worker
+		'''
+		def heartbeat(connection):
+			now = time.time()
+			return (connection.execute("UPDATE jobs SET leaseExpires = ?, updated = ? WHERE id = ? AND worker = ? AND status = 'leased'",
+				(now + leaseTime, now, jobId, worker)).rowcount == 1)
+		return (self.transaction(heartbeat))
+
+	def complete(self, jobId:int, worker:str):
+		'''
+			Marks a job as done
+				Returns:
+					False if the lease was lost to another worker, which will download the episode again
+		'''
+		def complete(connection):
+			return (connection.execute("UPDATE jobs SET status = 'done', leaseExpires = NULL, error = NULL, updated = ? "
+				+ "WHERE id = ? AND worker = ? AND status = 'leased'", (time.time(), jobId, worker)).rowcount == 1)
+		return (self.transaction(complete))
+
+	def fail(self, jobId:int, worker:str, error:str):
+		'''
+			Releases a failed job, it goes back to the queue until it was tried maxTries times
+				Returns:
+					False if the lease was lost to another worker
+		'''
+		def fail(connection):
+			return (connection.execute("UPDATE jobs SET status = CASE WHEN tries >= ? THEN 'failed' ELSE 'pending' END, "
+				+ "leaseExpires = NULL, error = ?, updated = ? WHERE id = ? AND worker = ? AND status = 'leased'",
+				(self.maxTries, error, time.time(), jobId, worker)).rowcount == 1)
+		return (self.transaction(fail))
+
+	def counts(self):
+		'''
+			Returns:
+				the number of jobs by status (pending, leased, done, failed), the leases that expired are counted as pending
+		'''
+		self.checkFork()
+		with self.lock:
+			rows = self.connect().execute("SELECT CASE WHEN status = 'leased' AND leaseExpires < ? THEN 'pending' ELSE status END, count(*) "
+				+ "FROM jobs GROUP BY 1", (time.time(),)).fetchall()
+		counts = { "pending" : 0, "leased" : 0, "done" : 0, "failed" : 0 }
+		for status, count in rows:
+			counts[status] += count
+		return (counts)